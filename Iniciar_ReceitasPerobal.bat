@@ -33,11 +33,12 @@ call venv\Scripts\activate.bat
 
 REM Instalar dependências se necessário
 echo Verificando dependencias...
-pip install -q flask flask-sqlalchemy flask-cors reportlab pandas
+pip install -q flask flask-sqlalchemy flask-cors reportlab pypdf waitress orjson brotli
 
-REM Iniciar o servidor Flask em segundo plano
+REM Iniciar o servidor de producao em segundo plano
+REM (threads e demais opcoes: RECEITAS_THREADS, RECEITAS_PORT, RECEITAS_SHUTDOWN_TIMEOUT)
 echo Iniciando servidor...
-start /B python src\main.py
+start /B python src\server.py
 
 REM Aguardar o servidor inicializar
 timeout /t 3 /nobreak >nul
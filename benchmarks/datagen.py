@@ -0,0 +1,183 @@
+import random
+from datetime import date, datetime, timedelta
+
+# Tamanhos padrão do banco de teste (multiplicados por --scale)
+DEFAULT_SIZES = {
+    'pacientes': 100_000,
+    'medicamentos': 5_000,
+    'receitas': 1_000_000,
+}
+
+DEFAULT_SEED = 20241201
+
+# Linhas gravadas por executemany
+INSERT_BATCH_SIZE = 20_000
+
+PRIMEIROS_NOMES = [
+    'Ana', 'Maria', 'José', 'João', 'Antônio', 'Francisco', 'Carlos', 'Paulo', 'Pedro', 'Lucas',
+    'Luiz', 'Marcos', 'Luís', 'Gabriel', 'Rafael', 'Daniel', 'Marcelo', 'Bruno', 'Eduardo', 'Felipe',
+    'Raimundo', 'Rodrigo', 'Manoel', 'Mateus', 'André', 'Fernando', 'Fábio', 'Leonardo', 'Gustavo', 'Guilherme',
+    'Juliana', 'Adriana', 'Márcia', 'Fernanda', 'Patrícia', 'Aline', 'Sandra', 'Camila', 'Amanda', 'Bruna',
+    'Jéssica', 'Letícia', 'Júlia', 'Luciana', 'Vanessa', 'Mariana', 'Gabriela', 'Vera', 'Vitória', 'Larissa',
+    'Cláudia', 'Beatriz', 'Luana', 'Rita', 'Sônia', 'Renata', 'Eliane', 'Josefa', 'Simone', 'Natália',
+]
+
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+    'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas',
+    'Cardoso', 'Ramos', 'Gonçalves', 'Santana', 'Teixeira', 'Araújo', 'Conceição', 'Pinto', 'Batista', 'Castro',
+]
+
+PRINCIPIOS_ATIVOS = [
+    'Sertralina', 'Clonazepam', 'Omeprazol', 'Fluoxetina', 'Diazepam', 'Losartana', 'Metformina',
+    'Sinvastatina', 'Atenolol', 'Captopril', 'Hidroclorotiazida', 'Paracetamol', 'Ibuprofeno', 'Dipirona',
+    'Amoxicilina', 'Azitromicina', 'Cefalexina', 'Ciprofloxacino', 'Prednisona', 'Dexametasona',
+    'Levotiroxina', 'Enalapril', 'Anlodipino', 'Furosemida', 'Espironolactona', 'Carvedilol', 'Propranolol',
+    'Ácido Acetilsalicílico', 'Clopidogrel', 'Varfarina', 'Glibenclamida', 'Insulina NPH', 'Ranitidina',
+    'Pantoprazol', 'Escitalopram', 'Citalopram', 'Paroxetina', 'Venlafaxina', 'Amitriptilina', 'Nortriptilina',
+    'Bupropiona', 'Quetiapina', 'Risperidona', 'Haloperidol', 'Olanzapina', 'Carbamazepina', 'Ácido Valproico',
+    'Fenitoína', 'Lamotrigina', 'Topiramato', 'Gabapentina', 'Pregabalina', 'Tramadol', 'Codeína',
+    'Loratadina', 'Dexclorfeniramina', 'Salbutamol', 'Budesonida', 'Metronidazol', 'Albendazol',
+]
+
+CONCENTRACOES = ['5 mg', '10 mg', '20 mg', '25 mg', '40 mg', '50 mg', '100 mg', '250 mg', '500 mg', '850 mg', '1 g', '2 mg/mL']
+
+APRESENTACOES = ['Comprimidos', 'Cápsulas', 'Solução oral', 'Gotas', 'Suspensão', 'Comprimidos revestidos', 'Xarope']
+
+POSOLOGIAS = [
+    'Tomar 1 comprimido pela manhã', 'Tomar 1 comprimido à noite', 'Tomar 1 comprimido de 8 em 8 horas',
+    'Tomar 1 cápsula em jejum', 'Tomar 20 gotas se dor ou febre', 'Tomar 1 comprimido de 12 em 12 horas',
+    'Tomar meio comprimido ao deitar', 'Tomar 5 mL de 6 em 6 horas',
+]
+
+INSTRUCOES = ['', '', 'Uso contínuo', 'Não interromper sem orientação médica', 'Tomar após as refeições', 'Evitar bebidas alcoólicas']
+
+OBSERVACOES = ['', '', '', 'Retorno em 30 dias', 'Paciente com hipertensão', 'Trazer exames no retorno', 'Uso contínuo']
+
+# Datas fixas para o resultado não depender do dia em que o gerador roda
+INICIO_CADASTROS = datetime(2020, 1, 1, 8, 0, 0)
+INICIO_RECEITAS = date(2023, 1, 1)
+
+# Mesmo formato que o SQLAlchemy grava no SQLite (o cursor das receitas compara texto)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def scaled_sizes(scale=1.0, sizes=None):
+    """Tamanhos do banco multiplicados por scale (mínimo de 1 registro por tabela)"""
+    sizes = dict(DEFAULT_SIZES, **(sizes or {}))
+    return {name: max(1, int(count * scale)) for name, count in sizes.items()}
+
+
+def format_cpf(number):
+    """CPF fictício (sem dígito verificador válido), único por número"""
+    digits = f'{number:011d}'
+    return f'{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}'
+
+
+def paciente_rows(count, rng):
+    for i in range(1, count + 1):
+        nome = f'{rng.choice(PRIMEIROS_NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}'
+        # Cerca de 10% sem CPF, como nos cadastros reais
+        cpf = format_cpf(i) if rng.random() > 0.1 else None
+        nascimento = date(1930, 1, 1) + timedelta(days=rng.randrange(0, 365 * 90))
+        created_at = INICIO_CADASTROS + timedelta(minutes=i)
+        yield (i, nome, cpf, nascimento.isoformat(), created_at.strftime(DATETIME_FORMAT))
+
+
+def medicamento_rows(count, rng):
+    combinacoes = len(PRINCIPIOS_ATIVOS) * len(CONCENTRACOES) * len(APRESENTACOES)
+    for i in range(1, count + 1):
+        # Percorre as combinações em ordem embaralhada; depois disso, nomes repetem
+        n = (i * 7919) % combinacoes
+        principio = PRINCIPIOS_ATIVOS[n % len(PRINCIPIOS_ATIVOS)]
+        concentracao = CONCENTRACOES[(n // len(PRINCIPIOS_ATIVOS)) % len(CONCENTRACOES)]
+        apresentacao = APRESENTACOES[(n // (len(PRINCIPIOS_ATIVOS) * len(CONCENTRACOES))) % len(APRESENTACOES)]
+        created_at = INICIO_CADASTROS + timedelta(minutes=i)
+        yield (i, principio, concentracao, apresentacao, created_at.strftime(DATETIME_FORMAT))
+
+
+def receita_rows(count, pacientes, medicamentos, rng):
+    """Receitas e seus itens (1 a 3 medicamentos por receita)"""
+    item_id = 0
+    for i in range(1, count + 1):
+        paciente_id = rng.randrange(1, pacientes + 1)
+        data_inicial = INICIO_RECEITAS + timedelta(days=rng.randrange(0, 365 * 3))
+        num_receitas = rng.choice((1, 1, 1, 2, 3, 6, 12))
+        observacoes = rng.choice(OBSERVACOES)
+        created_at = datetime.combine(data_inicial, datetime.min.time()) + timedelta(seconds=i % 86400)
+        receita = (i, paciente_id, data_inicial.isoformat(), num_receitas, observacoes, created_at.strftime(DATETIME_FORMAT))
+
+        itens = []
+        for medicamento_id in rng.sample(range(1, medicamentos + 1), min(medicamentos, rng.randint(1, 3))):
+            item_id += 1
+            itens.append((item_id, i, medicamento_id, rng.choice(POSOLOGIAS), rng.choice(INSTRUCOES)))
+        yield receita, itens
+
+
+INSERT_RECEITA = 'INSERT INTO receitas (id, paciente_id, data_inicial, num_receitas, observacoes, created_at) VALUES (?, ?, ?, ?, ?, ?)'
+INSERT_RECEITA_MEDICAMENTO = 'INSERT INTO receita_medicamentos (id, receita_id, medicamento_id, posologia, instrucoes) VALUES (?, ?, ?, ?, ?)'
+
+
+def _insert_batches(cursor, statement, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            cursor.executemany(statement, batch)
+            batch = []
+    if batch:
+        cursor.executemany(statement, batch)
+
+
+def generate(connection, sizes, seed=DEFAULT_SEED, progress=print):
+    """Preencher um banco vazio (já migrado) com dados sintéticos determinísticos
+
+    connection é uma conexão sqlite3 (DBAPI). O mesmo seed e os mesmos tamanhos
+    sempre geram exatamente os mesmos registros.
+    """
+    rng = random.Random(seed)
+    cursor = connection.cursor()
+
+    progress(f"Gerando {sizes['pacientes']} pacientes...")
+    _insert_batches(
+        cursor,
+        'INSERT INTO pacientes (id, nome_completo, cpf, data_nascimento, created_at) VALUES (?, ?, ?, ?, ?)',
+        paciente_rows(sizes['pacientes'], rng)
+    )
+
+    progress(f"Gerando {sizes['medicamentos']} medicamentos...")
+    _insert_batches(
+        cursor,
+        'INSERT INTO medicamentos (id, denominacao_generica, concentracao, apresentacao, created_at) VALUES (?, ?, ?, ?, ?)',
+        medicamento_rows(sizes['medicamentos'], rng)
+    )
+
+    progress(f"Gerando {sizes['receitas']} receitas...")
+    receitas, itens = [], []
+    for receita, receita_itens in receita_rows(sizes['receitas'], sizes['pacientes'], sizes['medicamentos'], rng):
+        receitas.append(receita)
+        itens.extend(receita_itens)
+        if len(receitas) >= INSERT_BATCH_SIZE:
+            cursor.executemany(INSERT_RECEITA, receitas)
+            cursor.executemany(INSERT_RECEITA_MEDICAMENTO, itens)
+            receitas, itens = [], []
+    if receitas:
+        cursor.executemany(INSERT_RECEITA, receitas)
+        cursor.executemany(INSERT_RECEITA_MEDICAMENTO, itens)
+
+    connection.commit()
+    cursor.execute('ANALYZE')
+    connection.commit()
+    cursor.close()
+
+
+def csv_pacientes(count, start, seed=DEFAULT_SEED):
+    """CSV de pacientes novos para o teste de importação (CPFs a partir de start)"""
+    rng = random.Random(seed + start)
+    lines = ['Nome Completo,CPF,Data Nascimento']
+    for i in range(start, start + count):
+        nome = f'{rng.choice(PRIMEIROS_NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}'
+        nascimento = date(1930, 1, 1) + timedelta(days=rng.randrange(0, 365 * 90))
+        lines.append(f'{nome},{format_cpf(i)},{nascimento.isoformat()}')
+    return '\n'.join(lines) + '\n'
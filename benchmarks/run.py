@@ -0,0 +1,286 @@
+import os
+import sys
+# Raiz do projeto no caminho, para importar src (mesmo ajuste de src/main.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import io
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, datetime
+
+from benchmarks import datagen
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(BENCHMARKS_DIR, '.data')
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+# Piora aceita (mediana) em relação à linha de base antes de acusar regressão
+DEFAULT_TOLERANCE = 0.25
+
+
+def parse_args(argv=None):
+    """Opções de linha de comando"""
+    parser = argparse.ArgumentParser(description='ReceitasPerobal - benchmarks da API e da geração de PDF')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Fração do banco padrão (100k pacientes, 5k medicamentos, 1M receitas)')
+    parser.add_argument('--seed', type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument('--db', default=None,
+                        help='Banco de teste (padrão: benchmarks/.data/bench_<scale>_<seed>.db)')
+    parser.add_argument('--regenerate', action='store_true', help='Recriar o banco de teste')
+    parser.add_argument('--only', default=None, help='Rodar só os testes cujo nome contém este texto')
+    parser.add_argument('--repeat', type=float, default=1.0, help='Multiplicador do número de repetições')
+    parser.add_argument('--output', default=None, help='Gravar os resultados (JSON) neste arquivo')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Linha de base para comparação')
+    parser.add_argument('--save-baseline', action='store_true', help='Gravar os resultados como nova linha de base')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Piora relativa aceita na mediana (0.25 = 25%%)')
+    return parser.parse_args(argv)
+
+
+def prepare_database(path, sizes, seed, regenerate=False):
+    """Criar (ou reaproveitar) o banco de teste com o esquema atual e os dados sintéticos"""
+    meta = {'sizes': sizes, 'seed': seed}
+    if os.path.exists(path) and not regenerate:
+        try:
+            with sqlite3.connect(path) as connection:
+                row = connection.execute("SELECT valor FROM benchmark_meta WHERE chave = 'dados'").fetchone()
+            if row and json.loads(row[0]) == meta:
+                return False
+        except sqlite3.Error:
+            pass
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    from src.migrate import create_app
+    from src.models.receitas_models import db
+    from src.utils.migrations import run_migrations
+    from src.utils.search_index import init_search_index
+
+    started = time.perf_counter()
+    app = create_app(f'sqlite:///{path}')
+    with app.app_context():
+        # Esquema pelas migrações, como em um banco real
+        run_migrations(verbose=False)
+
+        connection = db.engine.raw_connection()
+        try:
+            datagen.generate(connection, sizes, seed)
+            connection.execute('CREATE TABLE benchmark_meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL)')
+            connection.execute("INSERT INTO benchmark_meta VALUES ('dados', ?)", (json.dumps(meta),))
+            connection.commit()
+        finally:
+            connection.close()
+
+        # Índice de busca já sincronizado, para não ser reconstruído a cada execução
+        init_search_index(app)
+        db.engine.dispose()
+
+    print(f'Banco de teste gerado em {time.perf_counter() - started:.1f} s')
+    return True
+
+
+def copy_database(source, destination):
+    """Copiar o banco de teste (os testes gravam na cópia; o original fica intacto)"""
+    with sqlite3.connect(source) as source_connection, sqlite3.connect(destination) as destination_connection:
+        source_connection.backup(destination_connection)
+
+
+def summarize(samples):
+    """Estatísticas em milissegundos"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        'iterations': len(samples),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+    }
+
+
+def measure(function, iterations, warmup=1):
+    """Executar function warmup + iterations vezes e devolver os tempos medidos"""
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def expect(response, status=200):
+    """Conferir o status (um erro não pode virar um tempo "rápido") e consumir o corpo"""
+    body = response.get_data()
+    if response.status_code != status:
+        raise AssertionError(f'Status {response.status_code} (esperado {status}): {body[:200]!r}')
+    return body
+
+
+def build_cases(app, sizes, seed):
+    """Lista de (nome, função, repetições)"""
+    from src.utils.pdf_generator import get_pdf_generator
+
+    client = app.test_client()
+    gzip_headers = {'Accept-Encoding': 'gzip'}
+
+    # Cursor para uma página do meio da listagem de pacientes
+    first_page = client.get('/api/pacientes?limit=500&fields=id,nome_completo').get_json()
+    middle_cursor = first_page['next_cursor']
+    receitas_etag = client.get('/api/receitas?limit=50').headers.get('ETag')
+
+    paciente_id = max(1, sizes['pacientes'] // 2)
+    medicamento_ids = [1, max(1, sizes['medicamentos'] // 2), sizes['medicamentos']]
+
+    nova_receita = {
+        'paciente_id': paciente_id,
+        'data_inicial': '2025-03-01',
+        'num_receitas': 3,
+        'observacoes': 'Benchmark',
+        'medicamentos': [
+            {'medicamento_id': medicamento_id, 'posologia': 'Tomar 1 comprimido à noite', 'instrucoes': 'Uso contínuo'}
+            for medicamento_id in medicamento_ids
+        ],
+    }
+
+    # CPFs novos a cada importação (o total de pacientes cresce durante o teste)
+    import_state = {'next_cpf': 10 ** 10}
+
+    def import_pacientes():
+        csv_content = datagen.csv_pacientes(5000, import_state['next_cpf'], seed)
+        import_state['next_cpf'] += 5000
+        expect(client.post('/api/pacientes/import', json={'csv_content': csv_content}))
+
+    paciente_info = {'nome': 'Maria Souza Lima', 'data_nascimento': '1975-04-12', 'cpf_rg': '123.456.789-00'}
+    medicamentos_info = [
+        {'denominacao': 'Sertralina', 'concentracao': '50 mg', 'apresentacao': 'Comprimidos',
+         'posologia': 'Tomar 1 comprimido pela manhã', 'instrucoes': 'Uso contínuo'},
+        {'denominacao': 'Clonazepam', 'concentracao': '2 mg', 'apresentacao': 'Comprimidos',
+         'posologia': 'Tomar meio comprimido ao deitar', 'instrucoes': ''},
+    ]
+    generator = get_pdf_generator()
+
+    return [
+        # Listagens e busca
+        ('pacientes_pagina', lambda: expect(client.get('/api/pacientes?limit=50')), 50),
+        ('pacientes_pagina_meio', lambda: expect(client.get(f'/api/pacientes?limit=50&after={middle_cursor}')), 50),
+        ('pacientes_lista_completa_gzip', lambda: expect(client.get('/api/pacientes', headers=gzip_headers)), 3),
+        ('pacientes_busca', lambda: expect(client.get('/api/pacientes?search=silva&limit=50')), 30),
+        ('medicamentos_lista', lambda: expect(client.get('/api/medicamentos')), 30),
+        ('medicamentos_sugestao', lambda: expect(client.get('/api/medicamentos/suggest?q=ser')), 200),
+        ('receitas_pagina', lambda: expect(client.get('/api/receitas?limit=50')), 30),
+        ('receitas_por_paciente', lambda: expect(client.get(f'/api/receitas?paciente_id={paciente_id}&limit=50')), 50),
+        ('receitas_por_medicamento', lambda: expect(client.get(f'/api/receitas?medicamento_id={medicamento_ids[1]}&limit=50')), 30),
+        ('receitas_nao_modificado', lambda: expect(client.get('/api/receitas?limit=50', headers={'If-None-Match': receitas_etag}), 304), 200),
+        ('busca_geral', lambda: expect(client.get('/api/busca?q=sertralina&limit=20')), 30),
+        # CSV
+        ('pacientes_exportar_csv', lambda: expect(client.get('/api/pacientes/export?formato=csv')), 3),
+        ('pacientes_exportar_csv_gzip', lambda: expect(client.get('/api/pacientes/export?formato=csv&gzip=1', headers=gzip_headers)), 3),
+        ('pacientes_importar_csv_5000', import_pacientes, 5),
+        # Gravação
+        ('receita_criar', lambda: expect(client.post('/api/receitas', json=nova_receita), 201), 50),
+        # PDF (direto no gerador, sem cache)
+        ('pdf_receita_unica', lambda: generator.generate_receita_pdf(
+            paciente_info, medicamentos_info, date(2025, 3, 1), 'Retorno em 30 dias', output=io.BytesIO()), 20),
+        ('pdf_receitas_12_meses', lambda: generator.generate_receitas_multiplas(
+            paciente_info, medicamentos_info, 12, date(2025, 3, 1), 'Retorno em 30 dias', output=io.BytesIO()), 10),
+    ]
+
+
+def compare(results, baseline, tolerance):
+    """Comparar medianas com a linha de base; retorna a lista de regressões"""
+    regressions = []
+    print(f"\n{'teste':<34}{'mediana':>12}{'base':>12}{'variação':>11}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34}{result['median_ms']:>10.2f}ms{'-':>12}{'novo':>11}")
+            continue
+        ratio = result['median_ms'] / base['median_ms'] if base['median_ms'] else 1.0
+        flag = ' REGRESSÃO' if ratio > 1 + tolerance else ''
+        print(f"{name:<34}{result['median_ms']:>10.2f}ms{base['median_ms']:>10.2f}ms{(ratio - 1) * 100:>+10.1f}%{flag}")
+        if flag:
+            regressions.append({'name': name, 'median_ms': result['median_ms'], 'baseline_ms': base['median_ms'], 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = datagen.scaled_sizes(args.scale)
+    db_path = os.path.abspath(args.db or os.path.join(DEFAULT_DATA_DIR, f'bench_{args.scale:g}_{args.seed}.db'))
+
+    print(f"Banco de teste: {db_path} ({sizes['pacientes']} pacientes, {sizes['medicamentos']} medicamentos, {sizes['receitas']} receitas)")
+    prepare_database(db_path, sizes, args.seed, args.regenerate)
+
+    # Configuração lida por src.main na importação: cópia do banco de teste e caches temporários
+    scratch = tempfile.mkdtemp(prefix='receitas_bench_')
+    try:
+        copy_database(db_path, os.path.join(scratch, 'receitas.db'))
+        os.environ['RECEITAS_DATABASE_URI'] = f"sqlite:///{os.path.join(scratch, 'receitas.db')}"
+        os.environ['RECEITAS_PDF_CACHE_DIR'] = os.path.join(scratch, 'pdf_cache')
+        os.environ['RECEITAS_PDF_JOBS_DIR'] = os.path.join(scratch, 'pdf_jobs')
+        os.environ['RECEITAS_IMPORT_UPLOADS_DIR'] = os.path.join(scratch, 'import_uploads')
+
+        started = time.perf_counter()
+        from src.main import app
+        startup_s = time.perf_counter() - started
+
+        results = {}
+        for name, function, iterations in build_cases(app, sizes, args.seed):
+            if args.only and args.only not in name:
+                continue
+            iterations = max(1, int(iterations * args.repeat))
+            results[name] = summarize(measure(function, iterations))
+            print(f"{name:<34}{results[name]['median_ms']:>10.2f} ms (mediana de {iterations})")
+
+        report = {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'sizes': sizes,
+                'seed': args.seed,
+                'startup_s': round(startup_s, 3),
+            },
+            'results': results,
+        }
+
+        status = 0
+        if os.path.exists(args.baseline) and not args.save_baseline:
+            with open(args.baseline, encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+            if baseline.get('meta', {}).get('sizes') != sizes:
+                print('\nAtenção: a linha de base foi medida com outro tamanho de banco')
+            report['regressions'] = compare(results, baseline.get('results', {}), args.tolerance)
+            if report['regressions']:
+                print(f"\n{len(report['regressions'])} regressão(ões) acima de {args.tolerance:.0%}")
+                status = 1
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as output_file:
+                json.dump(report, output_file, ensure_ascii=False, indent=2)
+        if args.save_baseline:
+            with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+                json.dump(report, baseline_file, ensure_ascii=False, indent=2)
+            print(f'Linha de base gravada em {args.baseline}')
+        if not args.output:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        return status
+    finally:
+        # Cópia do banco, caches e arquivos temporários da execução
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import os
+import sys
+# Mesmo ajuste de caminho usado em main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import tempfile
+
+from src.migrate import create_app
+from src.utils.db_profile import apply_pragmas
+from src.utils.backup import (
+    BackupError, backup_filename, database_path, extract_backup, remove_database_file, verify_backup,
+    write_backup, restore_backup
+)
+
+
+def parse_args(argv=None):
+    """Opções de linha de comando"""
+    parser = argparse.ArgumentParser(description='ReceitasPerobal - backup e restauração do banco de dados')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    criar = commands.add_parser('criar', help='Gravar um backup comprimido (.db.gz) do banco em uso')
+    criar.add_argument('arquivo', nargs='?', default=None,
+                       help='Arquivo de destino (padrão: receitas_perobal_backup_<data>.db.gz)')
+
+    verificar = commands.add_parser('verificar', help='Conferir um backup (.db ou .db.gz) sem restaurar')
+    verificar.add_argument('arquivo')
+
+    restaurar = commands.add_parser('restaurar', help='Restaurar o banco a partir de um backup (.db ou .db.gz)')
+    restaurar.add_argument('arquivo')
+    return parser.parse_args(argv)
+
+
+def print_counts(counts):
+    for table, total in counts.items():
+        print(f'  {table}: {total}')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = create_app()
+
+    with app.app_context():
+        apply_pragmas(app)
+        print('Banco de dados:', app.config['SQLALCHEMY_DATABASE_URI'])
+
+        try:
+            if args.command == 'criar':
+                destino = write_backup(args.arquivo or backup_filename())
+                print(f'Backup gravado em {destino} ({os.path.getsize(destino)} bytes)')
+                return 0
+
+            fd, temp_path = tempfile.mkstemp(prefix='restauracao_', suffix='.db', dir=os.path.dirname(database_path()))
+            os.close(fd)
+            try:
+                with open(args.arquivo, 'rb') as origem:
+                    extract_backup(origem, temp_path)
+                if args.command == 'verificar':
+                    counts = verify_backup(temp_path)
+                    print('Backup íntegro:')
+                else:
+                    counts = restore_backup(temp_path)
+                    print('Banco restaurado:')
+                print_counts(counts)
+            finally:
+                remove_database_file(temp_path)
+        except BackupError as e:
+            print(f'Erro: {e}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,26 @@ from src.models.receitas_models import db
 from src.routes.pacientes import pacientes_bp
 from src.routes.medicamentos import medicamentos_bp
 from src.routes.receitas import receitas_bp
+from src.routes.busca import busca_bp
+from src.routes.jobs import jobs_bp
+from src.routes.metrics import metrics_bp
+from src.routes.stats import stats_bp
+from src.routes.backup import backup_bp
+from src.routes.imports import imports_bp
+from src.utils.search_index import init_search_index
+from src.utils.pdf_cache import init_pdf_cache
+from src.utils.pdf_jobs import init_pdf_jobs
+from src.utils.csv_upload import init_import_uploads
+from src.utils.medicamento_catalog import init_medicamento_catalog
+from src.utils.table_versions import track_table_versions
+from src.utils.json_provider import init_json_provider
+from src.utils.compression import init_compression
+from src.utils.metrics import init_metrics
+from src.utils.sql_diagnostics import init_sql_diagnostics
+from src.utils.db_profile import configure_database, apply_pragmas
+from src.utils.lifecycle import request_shutdown
+from src.utils.migrations import run_migrations, pending_migrations
+from src.utils.startup import startup_phase, start_background_warm_up
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -16,27 +36,87 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 # Habilitar CORS para todas as rotas
 CORS(app)
 
+# Métricas das requisições (/api/metrics); antes da compressão para medir o corpo enviado
+init_metrics(app)
+
+# Codificação JSON rápida (orjson, se instalado) e compressão gzip/brotli das respostas
+init_json_provider(app)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('RECEITAS_COMPRESS_MIN_BYTES', 1024))
+init_compression(app)
+
 # Registrar blueprints
 app.register_blueprint(pacientes_bp, url_prefix='/api')
 app.register_blueprint(medicamentos_bp, url_prefix='/api')
 app.register_blueprint(receitas_bp, url_prefix='/api')
+app.register_blueprint(busca_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(metrics_bp, url_prefix='/api')
+app.register_blueprint(stats_bp, url_prefix='/api')
+app.register_blueprint(backup_bp, url_prefix='/api')
+app.register_blueprint(imports_bp, url_prefix='/api')
 
-# Configuração do banco de dados
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'receitas.db')}"
+# Configuração do banco de dados (perfil escolhido por RECEITAS_DB_PROFILE)
+configure_database(app, os.path.join(os.path.dirname(__file__), 'database', 'receitas.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Processos usados na geração de PDFs em lote
+app.config['PDF_POOL_WORKERS'] = int(os.environ.get('RECEITAS_PDF_WORKERS', os.cpu_count() or 1))
+
+# Cache em disco dos PDFs gerados
+app.config['PDF_CACHE_DIR'] = os.environ.get('RECEITAS_PDF_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'database', 'pdf_cache'))
+app.config['PDF_CACHE_MAX_BYTES'] = int(os.environ.get('RECEITAS_PDF_CACHE_MAX_MB', 200)) * 1024 * 1024
+
+# PDFs gerados em segundo plano (/api/jobs): diretório, tarefas simultâneas e validade em segundos
+app.config['PDF_JOBS_DIR'] = os.environ.get('RECEITAS_PDF_JOBS_DIR', os.path.join(os.path.dirname(__file__), 'database', 'pdf_jobs'))
+app.config['PDF_JOB_WORKERS'] = int(os.environ.get('RECEITAS_PDF_JOB_WORKERS', 2))
+app.config['PDF_JOB_TTL'] = int(os.environ.get('RECEITAS_PDF_JOB_TTL', 3600))
+
+# Importação de CSV em pedaços (/api/imports): diretório das travas, validade dos envios em segundos e tamanho máximo do pedaço
+app.config['IMPORT_UPLOADS_DIR'] = os.environ.get('RECEITAS_IMPORT_UPLOADS_DIR', os.path.join(os.path.dirname(__file__), 'database', 'import_uploads'))
+app.config['IMPORT_UPLOAD_TTL'] = int(os.environ.get('RECEITAS_IMPORT_UPLOAD_TTL', 24 * 3600))
+app.config['IMPORT_MAX_CHUNK_BYTES'] = int(os.environ.get('RECEITAS_IMPORT_MAX_CHUNK_MB', 8)) * 1024 * 1024
+
+# Diagnóstico de SQL (consultas por requisição, consultas lentas e N+1); desligado por padrão
+app.config['SQL_DIAGNOSTICS'] = os.environ.get('RECEITAS_SQL_DIAGNOSTICS', '0') == '1'
+app.config['SQL_SLOW_QUERY_MS'] = float(os.environ.get('RECEITAS_SLOW_QUERY_MS', 100))
+app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('RECEITAS_N_PLUS_ONE_THRESHOLD', 5))
+
 db.init_app(app)
+init_pdf_cache(app)
+init_pdf_jobs(app)
+init_import_uploads(app)
+init_medicamento_catalog(app)
+
+# Versão por tabela, incrementada a cada commit (ETag das listagens)
+track_table_versions()
 
-# Printar o caminho absoluto do banco de dados
-print('Banco de dados em uso:', os.path.abspath(os.path.join(os.path.dirname(__file__), 'database', 'receitas.db')))
+# Printar o banco de dados em uso
+print('Banco de dados em uso:', app.config['SQLALCHEMY_DATABASE_URI'], f"(perfil {app.config['RECEITAS_DB_PROFILE']})")
 
-# Criar tabelas
+# Criar ou atualizar o esquema (RECEITAS_AUTO_MIGRATE=0 deixa para src/migrate.py)
 with app.app_context():
-    db.create_all()
+    apply_pragmas(app)
+    init_sql_diagnostics(app)
+    with startup_phase('migrações do banco'):
+        if os.environ.get('RECEITAS_AUTO_MIGRATE', '1') != '0':
+            run_migrations()
+        elif pending_migrations():
+            print('Atenção: há migrações pendentes; execute python src/migrate.py')
+    # Índice de busca FTS5 (pacientes, medicamentos e receitas)
+    with startup_phase('índice de busca'):
+        init_search_index(app, verify=os.environ.get('RECEITAS_SEARCH_INDEX_VERIFY', '0') == '1')
+
+# O gerador de PDF (ReportLab) e o catálogo são carregados em segundo plano
+# pelo servidor, depois de abrir a porta (start_background_warm_up)
 
 @app.route('/api/shutdown', methods=['POST'])
 def shutdown():
     """Endpoint para encerrar o servidor de forma controlada"""
     try:
+        # Servidor de produção (src/server.py): termina as requisições em andamento antes de sair
+        if request_shutdown():
+            return jsonify({'message': 'Sistema sendo encerrado...'}), 200
+        
         # Função para encerrar o servidor Flask
         func = request.environ.get('werkzeug.server.shutdown')
         if func is None:
@@ -74,4 +154,5 @@ def serve(path):
 
 
 if __name__ == '__main__':
+    start_background_warm_up(app)
     app.run(host='0.0.0.0', port=5001, debug=True)
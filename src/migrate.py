@@ -0,0 +1,65 @@
+import os
+import sys
+# Mesmo ajuste de caminho usado em main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+
+from flask import Flask
+from src.models.receitas_models import db
+from src.utils.db_profile import configure_database, apply_pragmas
+from src.utils.migrations import LATEST_VERSION, run_migrations, pending_migrations, current_version
+from src.utils.search_index import init_search_index
+
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'database', 'receitas.db')
+
+
+def parse_args(argv=None):
+    """Opções de linha de comando"""
+    parser = argparse.ArgumentParser(description='ReceitasPerobal - migrações do banco de dados')
+    parser.add_argument('--status', action='store_true',
+                        help='Mostrar a versão do banco e as migrações pendentes, sem aplicar')
+    parser.add_argument('--target', type=int, default=None,
+                        help='Aplicar apenas até esta versão')
+    parser.add_argument('--verify-search-index', action='store_true',
+                        help='Depois das migrações, comparar o índice de busca com as tabelas e reconstruir se necessário')
+    return parser.parse_args(argv)
+
+
+def create_app(database_uri=None):
+    """Aplicação mínima só com o banco (mesma configuração de main.py)"""
+    app = Flask(__name__)
+    if database_uri:
+        app.config['RECEITAS_DATABASE_URI'] = database_uri
+    configure_database(app, DEFAULT_DATABASE_PATH)
+    db.init_app(app)
+    return app
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = create_app()
+
+    with app.app_context():
+        apply_pragmas(app)
+        print('Banco de dados:', app.config['SQLALCHEMY_DATABASE_URI'])
+        print(f'Versão atual: {current_version()} (última: {LATEST_VERSION})')
+
+        if args.status:
+            for version, description, _ in pending_migrations():
+                print(f'  pendente {version}: {description}')
+            return 0
+
+        if not run_migrations(target=args.target):
+            print('Nenhuma migração pendente')
+
+        if args.verify_search_index:
+            if init_search_index(app, verify=True):
+                print('Índice de busca conferido')
+            else:
+                print('Busca FTS5 indisponível neste SQLite')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
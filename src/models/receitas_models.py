@@ -5,6 +5,9 @@ db = SQLAlchemy()
 
 class Paciente(db.Model):
     __tablename__ = 'pacientes'
+    __table_args__ = (
+        db.Index('ix_pacientes_nome_completo', 'nome_completo'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome_completo = db.Column(db.String(200), nullable=False)
@@ -17,12 +20,15 @@ class Paciente(db.Model):
             'id': self.id,
             'nome_completo': self.nome_completo,
             'cpf': self.cpf,
-            'data_nascimento': self.data_nascimento.isoformat() if self.data_nascimento else None,
-            'created_at': self.created_at.isoformat()
+            'data_nascimento': self.data_nascimento,
+            'created_at': self.created_at
         }
 
 class Medicamento(db.Model):
     __tablename__ = 'medicamentos'
+    __table_args__ = (
+        db.Index('ix_medicamentos_denominacao_generica', 'denominacao_generica'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     denominacao_generica = db.Column(db.String(200), nullable=False)
@@ -36,11 +42,16 @@ class Medicamento(db.Model):
             'denominacao_generica': self.denominacao_generica,
             'concentracao': self.concentracao,
             'apresentacao': self.apresentacao,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
 
 class Receita(db.Model):
     __tablename__ = 'receitas'
+    __table_args__ = (
+        db.Index('ix_receitas_paciente_id_created_at', 'paciente_id', 'created_at'),
+        db.Index('ix_receitas_created_at', 'created_at'),
+        db.Index('ix_receitas_data_inicial', 'data_inicial'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     paciente_id = db.Column(db.Integer, db.ForeignKey('pacientes.id'), nullable=False)
@@ -58,15 +69,19 @@ class Receita(db.Model):
             'id': self.id,
             'paciente_id': self.paciente_id,
             'paciente': self.paciente.to_dict() if self.paciente else None,
-            'data_inicial': self.data_inicial.isoformat(),
+            'data_inicial': self.data_inicial,
             'num_receitas': self.num_receitas,
             'observacoes': self.observacoes,
             'medicamentos': [med.to_dict() for med in self.medicamentos],
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
 
 class ReceitaMedicamento(db.Model):
     __tablename__ = 'receita_medicamentos'
+    __table_args__ = (
+        db.Index('ix_receita_medicamentos_receita_id', 'receita_id'),
+        db.Index('ix_receita_medicamentos_medicamento_id', 'medicamento_id', 'receita_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     receita_id = db.Column(db.Integer, db.ForeignKey('receitas.id'), nullable=False)
@@ -87,3 +102,22 @@ class ReceitaMedicamento(db.Model):
             'instrucoes': self.instrucoes
         }
 
+class VersaoTabela(db.Model):
+    __tablename__ = 'versoes_tabelas'
+    
+    # Contador de alterações por tabela (usado nos ETags das listagens)
+    nome = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+
+class EnvioImportacao(db.Model):
+    __tablename__ = 'envios_importacao'
+    __table_args__ = (
+        db.Index('ix_envios_importacao_updated_at', 'updated_at'),
+    )
+    
+    # Envio de CSV em partes (/api/imports): estado em JSON e o fim incompleto do último
+    # registro, gravados na mesma transação das linhas importadas de cada pedaço
+    id = db.Column(db.String(32), primary_key=True)
+    estado = db.Column(db.Text, nullable=False)
+    resto = db.Column(db.LargeBinary, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
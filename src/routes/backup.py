@@ -0,0 +1,65 @@
+import os
+import tempfile
+from flask import Blueprint, request, jsonify, Response
+from src.utils.backup import (
+    BackupError, backup_filename, create_backup_snapshot, database_path,
+    extract_backup, iter_compressed, remove_database_file, restore_backup
+)
+
+backup_bp = Blueprint('backup', __name__)
+
+
+@backup_bp.route('/backup', methods=['GET'])
+def download_backup():
+    """Backup completo do banco (.db.gz), transmitido enquanto é comprimido
+
+    O retrato do banco é tirado com a API de backup online do SQLite (não
+    bloqueia as gravações no modo WAL); o arquivo temporário é apagado ao fim
+    do envio.
+    """
+    try:
+        snapshot = create_backup_snapshot()
+        response = Response(iter_compressed(snapshot, remove=True), mimetype='application/gzip')
+        response.headers['Content-Disposition'] = f'attachment; filename={backup_filename()}'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    except BackupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@backup_bp.route('/restore', methods=['POST'])
+def upload_restore():
+    """Restaurar o banco a partir de um backup (.db ou .db.gz) enviado no campo file
+
+    O arquivo é conferido (PRAGMA integrity_check e tabelas) antes de tocar
+    no banco em uso; a troca é feita em uma única transação.
+    """
+    temp_path = None
+    try:
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'success': False, 'error': 'Nenhum arquivo enviado'}), 400
+
+        # Mesmo diretório do banco: o arquivo extraído pode ser grande para /tmp
+        fd, temp_path = tempfile.mkstemp(prefix='restauracao_', suffix='.db', dir=os.path.dirname(database_path()))
+        os.close(fd)
+        extract_backup(upload.stream, temp_path)
+        counts = restore_backup(temp_path)
+
+        return jsonify({
+            'success': True,
+            'message': (
+                f"Backup restaurado com sucesso! {counts['pacientes']} pacientes, "
+                f"{counts['medicamentos']} medicamentos e {counts['receitas']} receitas."
+            ),
+            'data': counts
+        })
+    except BackupError as e:
+        return jsonify({'success': False, 'error': str(e), 'message': f'Erro ao restaurar backup: {e}'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e), 'message': f'Erro ao restaurar backup: {e}'}), 500
+    finally:
+        if temp_path:
+            remove_database_file(temp_path)
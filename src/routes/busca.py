@@ -0,0 +1,74 @@
+from flask import Blueprint, request, jsonify
+from src.models.receitas_models import Paciente, Medicamento, Receita
+from src.utils.search_index import fts_enabled, ranked_ids
+
+busca_bp = Blueprint('busca', __name__)
+
+# Tipos de registro pesquisáveis e o modelo de cada um
+BUSCA_MODELOS = {
+    'pacientes': Paciente,
+    'medicamentos': Medicamento,
+    'receitas': Receita,
+}
+
+def serializar_receita(receita):
+    """Resumo da receita para resultados de busca"""
+    return {
+        'id': receita.id,
+        'paciente_id': receita.paciente_id,
+        'data_inicial': receita.data_inicial,
+        'num_receitas': receita.num_receitas,
+        'observacoes': receita.observacoes,
+        'created_at': receita.created_at
+    }
+
+@busca_bp.route('/busca', methods=['GET'])
+def buscar():
+    """Busca por relevância em pacientes, medicamentos e receitas"""
+    try:
+        termo = request.args.get('q', '').strip()
+        tipos = [t.strip() for t in request.args.get('tipo', ','.join(BUSCA_MODELOS)).split(',') if t.strip()]
+
+        invalidos = [t for t in tipos if t not in BUSCA_MODELOS]
+        if invalidos:
+            return jsonify({'success': False, 'error': f'Tipo de busca inválido: {", ".join(invalidos)}'}), 400
+
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Parâmetro limit inválido'}), 400
+
+        if not termo:
+            return jsonify({'success': False, 'error': 'Termo de busca não fornecido'}), 400
+
+        if not fts_enabled():
+            return jsonify({'success': False, 'error': 'Índice de busca indisponível'}), 503
+
+        resultados = {}
+        for tipo in tipos:
+            modelo = BUSCA_MODELOS[tipo]
+            ranking = ranked_ids(tipo, termo, limit)
+
+            # Carregar os registros de uma vez e manter a ordem de relevância
+            registros = {
+                registro.id: registro
+                for registro in modelo.query.filter(modelo.id.in_([id_ for id_, _ in ranking])).all()
+            } if ranking else {}
+
+            itens = []
+            for id_, score in ranking:
+                registro = registros.get(id_)
+                if registro is None:
+                    continue
+                item = serializar_receita(registro) if tipo == 'receitas' else registro.to_dict()
+                item['score'] = -score
+                itens.append(item)
+            resultados[tipo] = itens
+
+        return jsonify({
+            'success': True,
+            'data': resultados,
+            'total': sum(len(itens) for itens in resultados.values())
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,102 @@
+from flask import Blueprint, request, jsonify, url_for
+from src.models.receitas_models import db
+from src.utils.csv_upload import get_import_uploads, UploadNotFound, UploadConflict
+
+imports_bp = Blueprint('imports', __name__)
+
+def upload_status(state):
+    """Estado do envio para a resposta, com os links de progresso e dos pedaços"""
+    data = dict(state)
+    data['status_url'] = url_for('imports.get_upload', upload_id=state['id'])
+    data['next_chunk_url'] = (
+        url_for('imports.put_chunk', upload_id=state['id'], index=state['next_chunk'])
+        if state['status'] == 'receiving' else None
+    )
+    return data
+
+def conflict_response(e):
+    return jsonify({
+        'success': False,
+        'error': str(e),
+        'data': upload_status(e.state) if e.state is not None else None
+    }), 409
+
+@imports_bp.route('/imports', methods=['POST'])
+def create_upload():
+    """Abrir um envio de CSV em pedaços (tipo: pacientes ou medicamentos)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        state = get_import_uploads().create(
+            data.get('tipo'),
+            filename=data.get('filename'),
+            total_bytes=data.get('total_bytes')
+        )
+        return jsonify({'success': True, 'data': upload_status(state)}), 201
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@imports_bp.route('/imports/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Consultar progresso e contagens de um envio (também durante a importação)"""
+    try:
+        state = get_import_uploads().get(upload_id)
+        if state is None:
+            return jsonify({'success': False, 'error': 'Envio não encontrado ou expirado'}), 404
+
+        return jsonify({'success': True, 'data': upload_status(state)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@imports_bp.route('/imports/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def put_chunk(upload_id, index):
+    """Enviar o pedaço index (corpo com os bytes do arquivo) e importar as linhas completas"""
+    try:
+        uploads = get_import_uploads()
+        if request.content_length is not None and request.content_length > uploads.max_chunk_bytes:
+            return jsonify({'success': False, 'error': f'Pedaço maior que o limite de {uploads.max_chunk_bytes} bytes'}), 413
+
+        state = uploads.add_chunk(upload_id, index, request.get_data(cache=False))
+        return jsonify({'success': True, 'data': upload_status(state)})
+    except UploadNotFound as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except UploadConflict as e:
+        return conflict_response(e)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@imports_bp.route('/imports/<upload_id>/finish', methods=['POST'])
+def finish_upload(upload_id):
+    """Concluir o envio: importar o último registro e devolver o resumo"""
+    try:
+        state = get_import_uploads().finish(upload_id)
+        if state['tipo'] == 'medicamentos':
+            message = f'Importação concluída: {state["imported"]} medicamentos importados'
+        else:
+            message = f'Importação concluída: {state["imported"]} importados, {state["duplicated"]} duplicados ignorados'
+
+        return jsonify({'success': True, 'message': message, 'data': upload_status(state)})
+    except UploadNotFound as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except UploadConflict as e:
+        return conflict_response(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@imports_bp.route('/imports/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    """Cancelar o envio (as linhas já importadas continuam cadastradas)"""
+    try:
+        if not get_import_uploads().cancel(upload_id):
+            return jsonify({'success': False, 'error': 'Envio não encontrado ou expirado'}), 404
+
+        return jsonify({'success': True, 'message': 'Envio cancelado'})
+    except UploadConflict as e:
+        return conflict_response(e)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
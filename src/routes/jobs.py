@@ -0,0 +1,48 @@
+from flask import Blueprint, jsonify, send_file, url_for
+from src.utils.pdf_jobs import get_pdf_jobs
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def job_status(job):
+    """Estado da tarefa para a resposta, com o link de download quando pronta"""
+    data = dict(job)
+    data['status_url'] = url_for('jobs.get_job', job_id=job['id'])
+    data['download_url'] = url_for('jobs.download_job', job_id=job['id']) if job['status'] == 'done' else None
+    return data
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Consultar estado e progresso de uma tarefa em segundo plano"""
+    try:
+        job = get_pdf_jobs().get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Tarefa não encontrada ou expirada'}), 404
+
+        return jsonify({'success': True, 'data': job_status(job)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@jobs_bp.route('/jobs/<job_id>/download', methods=['GET'])
+def download_job(job_id):
+    """Baixar o PDF gerado pela tarefa"""
+    try:
+        jobs = get_pdf_jobs()
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Tarefa não encontrada ou expirada'}), 404
+
+        if job['status'] != 'done':
+            return jsonify({'success': False, 'error': 'PDF ainda não está pronto', 'data': job_status(job)}), 409
+
+        path = jobs.artifact_path(job_id)
+        if path is None:
+            return jsonify({'success': False, 'error': 'PDF expirado'}), 404
+
+        return send_file(
+            path,
+            as_attachment=True,
+            download_name=job['filename'],
+            mimetype='application/pdf'
+        )
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
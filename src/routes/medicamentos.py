@@ -1,32 +1,94 @@
 from flask import Blueprint, request, jsonify
 from src.models.receitas_models import db, Medicamento
+from src.utils.pagination import is_paginated_request, parse_limit, parse_fields, keyset_page
+from src.utils.search_index import match_filter
+from src.utils.table_versions import conditional_list
+from src.utils.csv_export import csv_response, iter_query_rows, gzip_requested
+from src.utils.medicamento_catalog import (
+    get_medicamento_catalog, invalidate_medicamento_catalog, DEFAULT_SUGGEST_LIMIT, MAX_SUGGEST_LIMIT
+)
+from src.utils.csv_import import MedicamentoImporter
+from src.utils.metrics import observe_import
+from sqlalchemy import select
 import csv
 import io
+import time
 from datetime import datetime
 
 medicamentos_bp = Blueprint('medicamentos', __name__)
 
+# Campos disponíveis para projeção na listagem paginada
+MEDICAMENTO_FIELDS = ('id', 'denominacao_generica', 'concentracao', 'apresentacao', 'created_at')
+
 @medicamentos_bp.route('/medicamentos', methods=['GET'])
+@conditional_list('medicamentos')
 def get_medicamentos():
     """Listar todos os medicamentos"""
     try:
         search = request.args.get('search', '')
         
+        # Modo paginado por cursor (limit, after e fields)
+        if is_paginated_request(request.args):
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                names, columns = parse_fields(request.args.get('fields'), Medicamento, MEDICAMENTO_FIELDS)
+                query = Medicamento.query
+                if search:
+                    query = query.filter(match_filter('medicamentos', Medicamento.id, Medicamento.denominacao_generica, search))
+                
+                data, next_cursor = keyset_page(
+                    query, Medicamento.denominacao_generica, Medicamento.id,
+                    columns, names, limit, request.args.get('after')
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            
+            return jsonify({
+                'success': True,
+                'data': data,
+                'count': len(data),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            })
+        
         if search:
-            medicamentos = Medicamento.query.filter(
-                Medicamento.denominacao_generica.ilike(f'%{search}%')
-            ).order_by(Medicamento.denominacao_generica).all()
+            medicamentos = [
+                medicamento.to_dict()
+                for medicamento in Medicamento.query.filter(
+                    match_filter('medicamentos', Medicamento.id, Medicamento.denominacao_generica, search)
+                ).order_by(Medicamento.denominacao_generica).all()
+            ]
         else:
-            medicamentos = Medicamento.query.order_by(Medicamento.denominacao_generica).all()
+            # Lista completa direto do catálogo em memória
+            medicamentos = get_medicamento_catalog().get().ordered
         
         return jsonify({
             'success': True,
-            'data': [medicamento.to_dict() for medicamento in medicamentos],
+            'data': medicamentos,
             'total': len(medicamentos)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@medicamentos_bp.route('/medicamentos/suggest', methods=['GET'])
+def suggest_medicamentos():
+    """Sugestões de medicamentos pelo início do nome (autocompletar no catálogo em memória; só confere a versão da tabela no banco)"""
+    try:
+        try:
+            limit = parse_limit(request.args.get('limit'), DEFAULT_SUGGEST_LIMIT, MAX_SUGGEST_LIMIT)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        medicamentos = get_medicamento_catalog().get().suggest(request.args.get('q', ''), limit)
+        
+        return jsonify({
+            'success': True,
+            'data': medicamentos,
+            'count': len(medicamentos)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @medicamentos_bp.route('/medicamentos', methods=['POST'])
 def create_medicamento():
     """Criar novo medicamento"""
@@ -44,6 +106,7 @@ def create_medicamento():
         
         db.session.add(medicamento)
         db.session.commit()
+        invalidate_medicamento_catalog()
         
         return jsonify({
             'success': True,
@@ -70,6 +133,7 @@ def update_medicamento(medicamento_id):
         medicamento.apresentacao = data.get('apresentacao')
         
         db.session.commit()
+        invalidate_medicamento_catalog()
         
         return jsonify({
             'success': True,
@@ -89,6 +153,7 @@ def delete_medicamento(medicamento_id):
         
         db.session.delete(medicamento)
         db.session.commit()
+        invalidate_medicamento_catalog()
         
         return jsonify({
             'success': True,
@@ -103,6 +168,26 @@ def delete_medicamento(medicamento_id):
 def export_medicamentos_csv():
     """Exportar medicamentos para CSV"""
     try:
+        # Download direto em text/csv, lendo o banco em lotes
+        if request.args.get('formato') == 'csv':
+            statement = select(
+                Medicamento.denominacao_generica, Medicamento.concentracao, Medicamento.apresentacao
+            ).order_by(Medicamento.denominacao_generica)
+            rows = iter_query_rows(
+                statement,
+                lambda row: [
+                    row.denominacao_generica,
+                    row.concentracao or '',
+                    row.apresentacao or ''
+                ]
+            )
+            return csv_response(
+                f'medicamentos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+                ['Denominação Genérica', 'Concentração', 'Apresentação'],
+                rows,
+                compress=gzip_requested()
+            )
+        
         medicamentos = Medicamento.query.order_by(Medicamento.denominacao_generica).all()
         
         output = io.StringIO()
@@ -141,42 +226,34 @@ def import_medicamentos_csv():
         if not csv_content:
             return jsonify({'success': False, 'error': 'Conteúdo CSV não fornecido'}), 400
         
-        # Processar CSV
+        # Processar CSV em lotes
         csv_reader = csv.DictReader(io.StringIO(csv_content))
         
-        imported = 0
-        errors = []
-        
-        for row_num, row in enumerate(csv_reader, start=2):
-            try:
-                denominacao = row.get('Denominação Genérica', '').strip()
-                concentracao = row.get('Concentração', '').strip()
-                apresentacao = row.get('Apresentação', '').strip()
-                
-                if not denominacao:
-                    errors.append(f'Linha {row_num}: Denominação genérica é obrigatória')
-                    continue
-                
-                # Criar medicamento
-                medicamento = Medicamento(
-                    denominacao_generica=denominacao,
-                    concentracao=concentracao if concentracao else None,
-                    apresentacao=apresentacao if apresentacao else None
-                )
-                
-                db.session.add(medicamento)
-                imported += 1
-                
-            except Exception as e:
-                errors.append(f'Linha {row_num}: {str(e)}')
-        
-        db.session.commit()
+        started = time.perf_counter()
+        importer = MedicamentoImporter()
+        try:
+            importer.feed(csv_reader)
+            result = importer.finish()
+        except Exception as e:
+            # Os lotes anteriores ao erro já foram gravados: informar o que ficou salvo
+            db.session.rollback()
+            result = importer.result()
+            observe_import('medicamentos', result, time.perf_counter() - started)
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'message': f'Importação interrompida: {result["imported"]} medicamentos já foram importados antes do erro',
+                **result
+            }), 500
+        finally:
+            # Lotes já gravados aparecem no catálogo mesmo se um lote seguinte falhar
+            invalidate_medicamento_catalog()
+        observe_import('medicamentos', result, time.perf_counter() - started)
         
         return jsonify({
             'success': True,
-            'message': f'Importação concluída: {imported} medicamentos importados',
-            'imported': imported,
-            'errors': errors
+            'message': f'Importação concluída: {result["imported"]} medicamentos importados',
+            **result
         })
         
     except Exception as e:
@@ -217,6 +294,7 @@ def seed_medicamentos():
             db.session.add(medicamento)
         
         db.session.commit()
+        invalidate_medicamento_catalog()
         
         return jsonify({
             'success': True,
@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+from src.utils.metrics import REGISTRY, CONTENT_TYPE
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas do processo no formato texto do Prometheus"""
+    response = Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -1,20 +1,56 @@
 from flask import Blueprint, request, jsonify
-from src.models.receitas_models import db, Paciente
+from src.models.receitas_models import db, Paciente, Receita
+from src.utils.pagination import is_paginated_request, parse_limit, parse_fields, keyset_page
+from src.utils.search_index import match_filter
+from src.utils.table_versions import conditional_list
+from src.utils.csv_export import csv_response, iter_query_rows, gzip_requested
+from sqlalchemy import select
+from src.utils.csv_import import PacienteImporter
+from src.utils.metrics import observe_import
 from datetime import datetime
 import csv
 import io
+import time
 
 pacientes_bp = Blueprint('pacientes', __name__)
 
+# Campos disponíveis para projeção na listagem paginada
+PACIENTE_FIELDS = ('id', 'nome_completo', 'cpf', 'data_nascimento', 'created_at')
+
 @pacientes_bp.route('/pacientes', methods=['GET'])
+@conditional_list('pacientes')
 def get_pacientes():
     """Listar todos os pacientes"""
     try:
         search = request.args.get('search', '')
         
+        # Modo paginado por cursor (limit, after e fields)
+        if is_paginated_request(request.args):
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                names, columns = parse_fields(request.args.get('fields'), Paciente, PACIENTE_FIELDS)
+                query = Paciente.query
+                if search:
+                    query = query.filter(match_filter('pacientes', Paciente.id, Paciente.nome_completo, search))
+                
+                data, next_cursor = keyset_page(
+                    query, Paciente.nome_completo, Paciente.id,
+                    columns, names, limit, request.args.get('after')
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            
+            return jsonify({
+                'success': True,
+                'data': data,
+                'count': len(data),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            })
+        
         if search:
             pacientes = Paciente.query.filter(
-                Paciente.nome_completo.ilike(f'%{search}%')
+                match_filter('pacientes', Paciente.id, Paciente.nome_completo, search)
             ).order_by(Paciente.nome_completo).all()
         else:
             pacientes = Paciente.query.order_by(Paciente.nome_completo).all()
@@ -99,8 +135,11 @@ def delete_paciente(paciente_id):
     try:
         paciente = Paciente.query.get_or_404(paciente_id)
         
-        # Verificar se tem receitas associadas
-        if paciente.receitas:
+        # Verificar se tem receitas associadas (sem carregar as receitas)
+        tem_receitas = db.session.execute(
+            select(Receita.id).where(Receita.paciente_id == paciente_id).limit(1)
+        ).first()
+        if tem_receitas is not None:
             return jsonify({
                 'success': False, 
                 'error': 'Não é possível excluir paciente com receitas cadastradas'
@@ -122,6 +161,26 @@ def delete_paciente(paciente_id):
 def export_pacientes_csv():
     """Exportar pacientes para CSV"""
     try:
+        # Download direto em text/csv, lendo o banco em lotes
+        if request.args.get('formato') == 'csv':
+            statement = select(
+                Paciente.nome_completo, Paciente.cpf, Paciente.data_nascimento
+            ).order_by(Paciente.nome_completo)
+            rows = iter_query_rows(
+                statement,
+                lambda row: [
+                    row.nome_completo,
+                    row.cpf or '',
+                    row.data_nascimento.strftime('%Y-%m-%d') if row.data_nascimento else ''
+                ]
+            )
+            return csv_response(
+                f'pacientes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+                ['Nome Completo', 'CPF', 'Data Nascimento'],
+                rows,
+                compress=gzip_requested()
+            )
+        
         pacientes = Paciente.query.order_by(Paciente.nome_completo).all()
         
         output = io.StringIO()
@@ -160,60 +219,31 @@ def import_pacientes_csv():
         if not csv_content:
             return jsonify({'success': False, 'error': 'Conteúdo CSV não fornecido'}), 400
         
-        # Processar CSV
+        # Processar CSV em lotes
         csv_reader = csv.DictReader(io.StringIO(csv_content))
         
-        imported = 0
-        duplicated = 0
-        errors = []
-        
-        for row_num, row in enumerate(csv_reader, start=2):
-            try:
-                nome = row.get('Nome Completo', '').strip()
-                cpf = row.get('CPF', '').strip()
-                data_nasc = row.get('Data Nascimento', '').strip()
-                
-                if not nome:
-                    errors.append(f'Linha {row_num}: Nome é obrigatório')
-                    continue
-                
-                # Verificar duplicata por CPF
-                if cpf:
-                    existing = Paciente.query.filter_by(cpf=cpf).first()
-                    if existing:
-                        duplicated += 1
-                        continue
-                
-                # Processar data
-                data_nascimento = None
-                if data_nasc:
-                    try:
-                        data_nascimento = datetime.strptime(data_nasc, '%Y-%m-%d').date()
-                    except ValueError:
-                        errors.append(f'Linha {row_num}: Data inválida ({data_nasc})')
-                        continue
-                
-                # Criar paciente
-                paciente = Paciente(
-                    nome_completo=nome,
-                    cpf=cpf if cpf else None,
-                    data_nascimento=data_nascimento
-                )
-                
-                db.session.add(paciente)
-                imported += 1
-                
-            except Exception as e:
-                errors.append(f'Linha {row_num}: {str(e)}')
-        
-        db.session.commit()
+        started = time.perf_counter()
+        importer = PacienteImporter()
+        try:
+            importer.feed(csv_reader)
+            result = importer.finish()
+        except Exception as e:
+            # Os lotes anteriores ao erro já foram gravados: informar o que ficou salvo
+            db.session.rollback()
+            result = importer.result()
+            observe_import('pacientes', result, time.perf_counter() - started)
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'message': f'Importação interrompida: {result["imported"]} pacientes já foram importados antes do erro',
+                **result
+            }), 500
+        observe_import('pacientes', result, time.perf_counter() - started)
         
         return jsonify({
             'success': True,
-            'message': f'Importação concluída: {imported} importados, {duplicated} duplicados ignorados',
-            'imported': imported,
-            'duplicated': duplicated,
-            'errors': errors
+            'message': f'Importação concluída: {result["imported"]} importados, {result["duplicated"]} duplicados ignorados',
+            **result
         })
         
     except Exception as e:
@@ -1,26 +1,179 @@
-from flask import Blueprint, request, jsonify, send_file
-from src.models.receitas_models import db, Receita, ReceitaMedicamento, Paciente, Medicamento
-from src.utils.pdf_generator import PDFGenerator
+from flask import Blueprint, request, jsonify, send_file, current_app, Response
+from src.models.receitas_models import db, Receita, ReceitaMedicamento, Paciente
+from src.utils.pagination import parse_limit, encode_cursor, decode_cursor
+from src.utils.pdf_pool import render_many, merge_pdfs, DEFAULT_PDF_WORKERS
+from src.utils.pdf_cache import pdf_cache_key, get_pdf_cache
+from src.utils.medicamento_catalog import get_medicamento_catalog
+from src.utils.table_versions import conditional_list
+from src.utils.pdf_jobs import get_pdf_jobs, JobQueueFull
+from src.utils.metrics import observe_pdf_render, observe_pdf_failure
+from src.routes.jobs import job_status
+from sqlalchemy import tuple_, insert
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
-import os
-import tempfile
+import json
+import time
+import zipfile
 
 receitas_bp = Blueprint('receitas', __name__)
 
+# Limite de receitas por requisição de PDF em lote
+MAX_BATCH_SIZE = 500
+
 @receitas_bp.route('/receitas', methods=['GET'])
+@conditional_list('receitas', 'receita_medicamentos', 'pacientes', 'medicamentos')
 def get_receitas():
-    """Listar todas as receitas"""
+    """Listar receitas (com filtros; paginado por created_at quando pedido com limit ou after)"""
     try:
-        receitas = Receita.query.order_by(Receita.created_at.desc()).all()
+        # Receitas não têm projeção de campos: só limit e after ativam o modo paginado
+        paginated = bool(request.args.get('limit') or request.args.get('after'))
+        try:
+            query = apply_receita_filters(receitas_with_relations(), request.args)
+            if paginated:
+                limit = parse_limit(request.args.get('limit'))
+                
+                # Cursor: (created_at, id) da última receita da página anterior
+                if request.args.get('after'):
+                    created_at, last_id = decode_receita_cursor(request.args['after'])
+                    query = query.filter(
+                        tuple_(Receita.created_at, Receita.id) < tuple_(created_at, last_id)
+                    )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        query = query.order_by(Receita.created_at.desc(), Receita.id.desc())
+        
+        if not paginated:
+            receitas = query.all()
+            return jsonify({
+                'success': True,
+                'data': [receita.to_dict() for receita in receitas],
+                'total': len(receitas)
+            })
+        
+        receitas = query.limit(limit + 1).all()
+        has_more = len(receitas) > limit
+        receitas = receitas[:limit]
+        
+        next_cursor = None
+        if has_more:
+            last = receitas[-1]
+            next_cursor = encode_cursor([last.created_at.isoformat(), last.id])
         
         return jsonify({
             'success': True,
             'data': [receita.to_dict() for receita in receitas],
-            'total': len(receitas)
+            'count': len(receitas),
+            'next_cursor': next_cursor,
+            'has_more': has_more
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def decode_receita_cursor(cursor):
+    """Decodificar o cursor da listagem de receitas em (created_at, id)"""
+    created_at, last_id = decode_cursor(cursor)
+    if not isinstance(created_at, str) or not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError('Cursor inválido')
+    try:
+        return datetime.fromisoformat(created_at), last_id
+    except ValueError:
+        raise ValueError('Cursor inválido')
+
+def receitas_with_relations():
+    """Consulta de receitas já carregando paciente e medicamentos (sem N+1)"""
+    return Receita.query.options(
+        joinedload(Receita.paciente),
+        selectinload(Receita.medicamentos).joinedload(ReceitaMedicamento.medicamento)
+    )
+
+def apply_receita_filters(query, filters):
+    """Aplicar filtros paciente_id, medicamento_id, data_de e data_ate
+
+    filters pode ser request.args ou um dicionário vindo do corpo JSON.
+    """
+    if filters.get('paciente_id'):
+        query = query.filter(Receita.paciente_id == parse_int_param(filters, 'paciente_id'))
+    
+    if filters.get('medicamento_id'):
+        query = query.filter(Receita.id.in_(
+            db.session.query(ReceitaMedicamento.receita_id).filter(
+                ReceitaMedicamento.medicamento_id == parse_int_param(filters, 'medicamento_id')
+            )
+        ))
+    
+    if filters.get('data_de'):
+        query = query.filter(Receita.data_inicial >= parse_date_param(filters, 'data_de'))
+    
+    if filters.get('data_ate'):
+        query = query.filter(Receita.data_inicial <= parse_date_param(filters, 'data_ate'))
+    
+    return query
+
+def parse_int_param(params, name):
+    """Converter parâmetro para inteiro"""
+    try:
+        return int(params[name])
+    except (TypeError, ValueError):
+        raise ValueError(f'Parâmetro {name} inválido: {params[name]}')
+
+def parse_date_param(params, name):
+    """Converter parâmetro (YYYY-MM-DD) para data"""
+    try:
+        return datetime.strptime(params[name], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f'Parâmetro {name} inválido: {params[name]}')
+
+def receita_pdf_data(receita):
+    """Montar os dados usados pelo gerador de PDF a partir de uma receita salva"""
+    # Preparar dados do paciente
+    paciente_info = {
+        'nome': receita.paciente.nome_completo,
+        'data_nascimento': receita.paciente.data_nascimento.isoformat() if receita.paciente.data_nascimento else None,
+        'cpf_rg': receita.paciente.cpf
+    }
+    
+    # Preparar dados dos medicamentos
+    medicamentos_info = []
+    for receita_med in receita.medicamentos:
+        med_info = {
+            'denominacao': receita_med.medicamento.denominacao_generica,
+            'concentracao': receita_med.medicamento.concentracao,
+            'apresentacao': receita_med.medicamento.apresentacao,
+            'posologia': receita_med.posologia,
+            'instrucoes': receita_med.instrucoes
+        }
+        medicamentos_info.append(med_info)
+    
+    return {
+        'paciente_info': paciente_info,
+        'medicamentos_info': medicamentos_info,
+        'num_receitas': receita.num_receitas,
+        'data_inicial': receita.data_inicial,
+        'observacoes': receita.observacoes
+    }
+
+def resolve_medicamentos(itens):
+    """Buscar no catálogo em memória os medicamentos dos itens da receita
+
+    Retorna (medicamentos na ordem dos itens, None) ou (None, mensagem de erro)
+    quando algum ID não existe, antes de qualquer gravação. Cada medicamento é
+    o dicionário do catálogo (mesmo formato de Medicamento.to_dict).
+    """
+    ids = []
+    for item in itens:
+        try:
+            ids.append(int(item['medicamento_id']))
+        except (KeyError, TypeError, ValueError):
+            return None, f'Medicamento ID {item.get("medicamento_id") if isinstance(item, dict) else item} inválido'
+    
+    catalogo = get_medicamento_catalog().get().by_id
+    faltando = [medicamento_id for medicamento_id in ids if medicamento_id not in catalogo]
+    if faltando:
+        return None, f'Medicamento ID {faltando[0]} não encontrado'
+    
+    return [catalogo[medicamento_id] for medicamento_id in ids], None
+
 @receitas_bp.route('/receitas', methods=['POST'])
 def create_receita():
     """Criar nova receita"""
@@ -34,17 +187,21 @@ def create_receita():
         if not data.get('medicamentos') or len(data['medicamentos']) == 0:
             return jsonify({'success': False, 'error': 'Pelo menos um medicamento é obrigatório'}), 400
         
-        # Verificar se paciente existe
+        # Verificar se paciente e medicamentos existem antes de gravar qualquer coisa
         paciente = Paciente.query.get(data['paciente_id'])
         if not paciente:
             return jsonify({'success': False, 'error': 'Paciente não encontrado'}), 404
         
+        medicamentos, erro = resolve_medicamentos(data['medicamentos'])
+        if erro:
+            return jsonify({'success': False, 'error': erro}), 404
+        
         # Processar data inicial
         data_inicial = datetime.strptime(data['data_inicial'], '%Y-%m-%d').date()
         
         # Criar receita
         receita = Receita(
-            paciente_id=data['paciente_id'],
+            paciente_id=paciente.id,
             data_inicial=data_inicial,
             num_receitas=data.get('num_receitas', 1),
             observacoes=data.get('observacoes', '')
@@ -53,27 +210,26 @@ def create_receita():
         db.session.add(receita)
         db.session.flush()  # Para obter o ID da receita
         
-        # Adicionar medicamentos
-        for med_data in data['medicamentos']:
-            # Verificar se medicamento existe
-            medicamento = Medicamento.query.get(med_data['medicamento_id'])
-            if not medicamento:
-                return jsonify({'success': False, 'error': f'Medicamento ID {med_data["medicamento_id"]} não encontrado'}), 404
-            
-            receita_medicamento = ReceitaMedicamento(
-                receita_id=receita.id,
-                medicamento_id=med_data['medicamento_id'],
-                posologia=med_data.get('posologia', ''),
-                instrucoes=med_data.get('instrucoes', '')
-            )
-            
-            db.session.add(receita_medicamento)
+        # Adicionar medicamentos: um único INSERT para todos os itens
+        db.session.execute(insert(ReceitaMedicamento), [
+            {
+                'receita_id': receita.id,
+                'medicamento_id': medicamento['id'],
+                'posologia': med_data.get('posologia', ''),
+                'instrucoes': med_data.get('instrucoes', '')
+            }
+            for medicamento, med_data in zip(medicamentos, data['medicamentos'])
+        ])
         
+        receita_id = receita.id
         db.session.commit()
         
+        # Recarregar com paciente e medicamentos em consultas fixas
+        receita_dict = receitas_with_relations().filter(Receita.id == receita_id).one().to_dict()
+        
         return jsonify({
             'success': True,
-            'data': receita.to_dict(),
+            'data': receita_dict,
             'message': 'Receita criada com sucesso'
         }), 201
         
@@ -81,72 +237,99 @@ def create_receita():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@receitas_bp.route('/receitas/<int:receita_id>/pdf', methods=['GET'])
+def pdf_job_requested(data=None):
+    """Cliente pediu geração em segundo plano (?async=1 ou "async": true no corpo)"""
+    return request.args.get('async') == '1' or bool(data and data.get('async'))
+
+def queue_receita_pdf(pdf_data, filename):
+    """Enfileirar a geração do PDF e responder 202 com a tarefa (consultar em /api/jobs/<id>)"""
+    try:
+        job = get_pdf_jobs().submit(pdf_data, filename)
+    except JobQueueFull as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    data = job_status(job)
+    response = jsonify({
+        'success': True,
+        'data': data,
+        'message': 'Geração do PDF iniciada'
+    })
+    response.headers['Location'] = data['status_url']
+    return response, 202
+
+def send_receita_pdf(pdf_data, filename):
+    """Responder com o PDF da receita, usando o cache e o ETag
+
+    O ETag é o hash dos dados de renderização: se o navegador já tem a mesma
+    versão (If-None-Match), responde 304 sem gerar nada.
+    """
+    etag = pdf_cache_key(pdf_data)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    cache = get_pdf_cache()
+    pdf_file = cache.get(etag) if cache is not None else None
+    
+    if pdf_file is None:
+        # ReportLab só é importado quando um PDF precisa ser gerado (início mais rápido)
+        from src.utils.pdf_generator import get_pdf_generator, create_pdf_buffer
+
+        # Receita única ou múltiplas, gerada em memória
+        pdf_file = create_pdf_buffer()
+        started = time.perf_counter()
+        try:
+            get_pdf_generator().generate_pdf(**pdf_data, output=pdf_file)
+        except Exception:
+            observe_pdf_failure('requisicao')
+            raise
+        observe_pdf_render('requisicao', time.perf_counter() - started, pdf_data['num_receitas'], pdf_file.tell())
+        pdf_file.seek(0)
+        
+        if cache is not None:
+            cache.put(etag, pdf_file.read())
+            pdf_file.seek(0)
+    
+    return send_file(
+        pdf_file,
+        as_attachment=True,
+        download_name=filename,
+        mimetype='application/pdf',
+        etag=etag
+    )
+
+@receitas_bp.route('/receitas/<int:receita_id>/pdf', methods=['GET', 'POST'])
 def generate_receita_pdf(receita_id):
-    """Gerar PDF da receita"""
+    """Gerar PDF da receita (POST ou ?async=1: em segundo plano)"""
+    from src.utils.pdf_generator import get_pdf_generator
+
     try:
         receita = Receita.query.get_or_404(receita_id)
-        
-        # Preparar dados do paciente
-        paciente_info = {
-            'nome': receita.paciente.nome_completo,
-            'data_nascimento': receita.paciente.data_nascimento.isoformat() if receita.paciente.data_nascimento else None,
-            'cpf_rg': receita.paciente.cpf
-        }
-        
-        # Preparar dados dos medicamentos
-        medicamentos_info = []
-        for receita_med in receita.medicamentos:
-            med_info = {
-                'denominacao': receita_med.medicamento.denominacao_generica,
-                'concentracao': receita_med.medicamento.concentracao,
-                'apresentacao': receita_med.medicamento.apresentacao,
-                'posologia': receita_med.posologia,
-                'instrucoes': receita_med.instrucoes
-            }
-            medicamentos_info.append(med_info)
-        
-        # Gerar PDF
-        pdf_generator = PDFGenerator()
-        
-        if receita.num_receitas == 1:
-            # Receita única
-            pdf_file = pdf_generator.generate_receita_pdf(
-                paciente_info,
-                medicamentos_info,
-                receita.data_inicial,
-                receita.observacoes
-            )
-        else:
-            # Múltiplas receitas
-            pdf_file = pdf_generator.generate_receitas_multiplas(
-                paciente_info,
-                medicamentos_info,
-                receita.num_receitas,
-                receita.data_inicial,
-                receita.observacoes
-            )
+        pdf_data = receita_pdf_data(receita)
         
         # Nome do arquivo
-        filename = pdf_generator.get_filename_for_patient(
+        filename = get_pdf_generator().get_filename_for_patient(
             receita.paciente.nome_completo,
             receita.data_inicial,
             receita.num_receitas
         )
         
-        return send_file(
-            pdf_file,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
-        )
+        if request.method == 'POST' or pdf_job_requested():
+            return queue_receita_pdf(pdf_data, filename)
+        
+        return send_receita_pdf(pdf_data, filename)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @receitas_bp.route('/receitas/generate', methods=['POST'])
 def generate_receita_direct():
-    """Gerar receita diretamente sem salvar no banco"""
+    """Gerar receita diretamente sem salvar no banco (?async=1: em segundo plano)"""
+    from src.utils.pdf_generator import get_pdf_generator
+
     try:
         data = request.get_json()
         
@@ -170,60 +353,143 @@ def generate_receita_direct():
         }
         
         # Preparar dados dos medicamentos
-        medicamentos_info = []
-        for med_data in data['medicamentos']:
-            medicamento = Medicamento.query.get(med_data['medicamento_id'])
-            if not medicamento:
-                return jsonify({'success': False, 'error': f'Medicamento ID {med_data["medicamento_id"]} não encontrado'}), 404
-            
-            med_info = {
-                'denominacao': medicamento.denominacao_generica,
-                'concentracao': medicamento.concentracao,
-                'apresentacao': medicamento.apresentacao,
+        medicamentos, erro = resolve_medicamentos(data['medicamentos'])
+        if erro:
+            return jsonify({'success': False, 'error': erro}), 404
+        
+        medicamentos_info = [
+            {
+                'denominacao': medicamento['denominacao_generica'],
+                'concentracao': medicamento['concentracao'],
+                'apresentacao': medicamento['apresentacao'],
                 'posologia': med_data.get('posologia', ''),
                 'instrucoes': med_data.get('instrucoes', '')
             }
-            medicamentos_info.append(med_info)
+            for medicamento, med_data in zip(medicamentos, data['medicamentos'])
+        ]
         
         # Processar data inicial
         data_inicial = datetime.strptime(data['data_inicial'], '%Y-%m-%d').date()
         num_receitas = data.get('num_receitas', 1)
         observacoes = data.get('observacoes', '')
         
-        # Gerar PDF
-        pdf_generator = PDFGenerator()
-        
-        if num_receitas == 1:
-            # Receita única
-            pdf_file = pdf_generator.generate_receita_pdf(
-                paciente_info,
-                medicamentos_info,
-                data_inicial,
-                observacoes
-            )
-        else:
-            # Múltiplas receitas
-            pdf_file = pdf_generator.generate_receitas_multiplas(
-                paciente_info,
-                medicamentos_info,
-                num_receitas,
-                data_inicial,
-                observacoes
-            )
+        pdf_data = {
+            'paciente_info': paciente_info,
+            'medicamentos_info': medicamentos_info,
+            'num_receitas': num_receitas,
+            'data_inicial': data_inicial,
+            'observacoes': observacoes
+        }
         
         # Nome do arquivo
-        filename = pdf_generator.get_filename_for_patient(
+        filename = get_pdf_generator().get_filename_for_patient(
             paciente.nome_completo,
             data_inicial,
             num_receitas
         )
         
-        return send_file(
-            pdf_file,
+        if pdf_job_requested(data):
+            return queue_receita_pdf(pdf_data, filename)
+        
+        return send_receita_pdf(pdf_data, filename)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@receitas_bp.route('/receitas/pdf/batch', methods=['POST'])
+def generate_receitas_batch():
+    """Gerar PDFs de várias receitas em paralelo (PDF único ou ZIP)"""
+    from src.utils.pdf_generator import get_pdf_generator, create_pdf_buffer
+
+    try:
+        data = request.get_json() or {}
+        formato = data.get('formato', 'pdf')
+        
+        if formato not in ('pdf', 'zip'):
+            return jsonify({'success': False, 'error': 'Formato deve ser pdf ou zip'}), 400
+        
+        # Receitas por lista de IDs (na ordem pedida) ou por filtro
+        try:
+            if data.get('receita_ids'):
+                receita_ids = [int(receita_id) for receita_id in data['receita_ids']]
+                if len(receita_ids) > MAX_BATCH_SIZE:
+                    return jsonify({'success': False, 'error': f'Máximo de {MAX_BATCH_SIZE} receitas por lote'}), 400
+                
+                encontradas = {
+                    receita.id: receita
+                    for receita in receitas_with_relations().filter(Receita.id.in_(receita_ids)).all()
+                }
+                receitas = [(receita_id, encontradas.get(receita_id)) for receita_id in receita_ids]
+            elif data.get('filtro'):
+                query = apply_receita_filters(receitas_with_relations(), data['filtro'])
+                encontradas = query.order_by(Receita.created_at.desc(), Receita.id.desc()).limit(MAX_BATCH_SIZE + 1).all()
+                if len(encontradas) > MAX_BATCH_SIZE:
+                    return jsonify({'success': False, 'error': f'Máximo de {MAX_BATCH_SIZE} receitas por lote'}), 400
+                receitas = [(receita.id, receita) for receita in encontradas]
+            else:
+                return jsonify({'success': False, 'error': 'Informe receita_ids ou filtro'}), 400
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if not receitas:
+            return jsonify({'success': False, 'error': 'Nenhuma receita encontrada'}), 404
+        
+        # Renderizar em paralelo no pool de processos
+        jobs = [receita_pdf_data(receita) for _, receita in receitas if receita is not None]
+        workers = current_app.config.get('PDF_POOL_WORKERS', DEFAULT_PDF_WORKERS)
+        rendered = iter(render_many(jobs, workers))
+        
+        pdf_generator = get_pdf_generator()
+        itens = []
+        for receita_id, receita in receitas:
+            if receita is None:
+                itens.append({'receita_id': receita_id, 'pdf': None, 'error': 'Receita não encontrada'})
+                continue
+            pdf, error = next(rendered)
+            filename = pdf_generator.get_filename_for_patient(
+                receita.paciente.nome_completo,
+                receita.data_inicial,
+                receita.num_receitas
+            )
+            itens.append({'receita_id': receita_id, 'pdf': pdf, 'error': error, 'filename': filename})
+        
+        erros = [{'receita_id': item['receita_id'], 'error': item['error']} for item in itens if item['error']]
+        gerados = [item for item in itens if item['pdf'] is not None]
+        
+        if not gerados:
+            return jsonify({'success': False, 'error': 'Nenhum PDF foi gerado', 'errors': erros}), 422
+        
+        output = create_pdf_buffer()
+        data_lote = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        if formato == 'pdf':
+            merge_pdfs([item['pdf'] for item in gerados], output)
+            download_name = f'receitas_lote_{data_lote}.pdf'
+            mimetype = 'application/pdf'
+        else:
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                for posicao, item in enumerate(itens, 1):
+                    if item['pdf'] is not None:
+                        zip_file.writestr(f"{posicao:03d}_{item['filename']}", item['pdf'])
+                zip_file.writestr('relatorio.json', json.dumps({
+                    'total': len(itens),
+                    'gerados': len(gerados),
+                    'erros': erros
+                }, ensure_ascii=False, indent=2))
+            download_name = f'receitas_lote_{data_lote}.zip'
+            mimetype = 'application/zip'
+        
+        output.seek(0)
+        response = send_file(
+            output,
             as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
+            download_name=download_name,
+            mimetype=mimetype
         )
+        response.headers['X-Batch-Total'] = str(len(itens))
+        response.headers['X-Batch-Generated'] = str(len(gerados))
+        response.headers['X-Batch-Errors'] = json.dumps(erros)
+        return response
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,152 @@
+from flask import Blueprint, request, jsonify, Response
+from src.models.receitas_models import db, Paciente, Medicamento, Receita, ReceitaMedicamento
+from src.utils.medicamento_catalog import get_medicamento_catalog
+from src.utils.pagination import parse_limit
+from src.utils.table_versions import table_versions
+from src.utils.compression import etag_matches
+from sqlalchemy import select, func
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import hashlib
+import threading
+
+stats_bp = Blueprint('stats', __name__)
+
+# Agrupamentos aceitos em ?periodo=: formato do strftime do SQLite e quantidade padrão
+PERIODOS = {
+    'dia': ('%Y-%m-%d', 30),
+    'mes': ('%Y-%m', 12),
+    'ano': ('%Y', 5),
+}
+MAX_PERIODOS = 366
+
+DEFAULT_TOP_MEDICAMENTOS = 10
+MAX_TOP_MEDICAMENTOS = 50
+
+# Tabelas usadas nas estatísticas: qualquer gravação nelas invalida o resultado
+STATS_TABLES = ('pacientes', 'medicamentos', 'receitas', 'receita_medicamentos')
+
+# Resultados recentes por parâmetros, período atual e versão das tabelas
+STATS_CACHE_SIZE = 32
+_stats_cache = OrderedDict()
+_stats_cache_lock = threading.Lock()
+
+
+def period_labels(periodo, quantidade, agora):
+    """Rótulos dos últimos períodos, do mais antigo ao atual (ex.: 2024-11, 2024-12)"""
+    if periodo == 'dia':
+        return [(agora.date() - timedelta(days=i)).isoformat() for i in reversed(range(quantidade))]
+    if periodo == 'ano':
+        return [str(agora.year - i) for i in reversed(range(quantidade))]
+    labels = []
+    ano, mes = agora.year, agora.month
+    for _ in range(quantidade):
+        labels.append(f'{ano:04d}-{mes:02d}')
+        ano, mes = (ano, mes - 1) if mes > 1 else (ano - 1, 12)
+    return labels[::-1]
+
+
+def period_start(periodo, label):
+    """Início do período mais antigo, para filtrar pelo índice de created_at"""
+    if periodo == 'dia':
+        return datetime.strptime(label, '%Y-%m-%d')
+    if periodo == 'ano':
+        return datetime(int(label), 1, 1)
+    return datetime.strptime(label, '%Y-%m')
+
+
+def compute_stats(periodo, labels, top):
+    """Totais, receitas por período e medicamentos mais prescritos"""
+    formato = PERIODOS[periodo][0]
+
+    # Totais (COUNT usa o menor índice de cada tabela)
+    totais = db.session.execute(
+        select(
+            select(func.count()).select_from(Paciente).scalar_subquery(),
+            select(func.count()).select_from(Medicamento).scalar_subquery(),
+            select(func.count()).select_from(Receita).scalar_subquery(),
+            select(func.coalesce(func.sum(Receita.num_receitas), 0)).scalar_subquery(),
+        )
+    ).one()
+
+    # Receitas emitidas por período (created_at em UTC, como gravado)
+    chave = func.strftime(formato, Receita.created_at)
+    por_periodo = dict(db.session.execute(
+        select(chave, func.count())
+        .where(Receita.created_at >= period_start(periodo, labels[0]))
+        .group_by(chave)
+    ).all())
+
+    # Medicamentos mais prescritos (nomes vêm do catálogo em memória, conferido pela versão da tabela)
+    mais_prescritos = db.session.execute(
+        select(ReceitaMedicamento.medicamento_id, func.count().label('total'))
+        .group_by(ReceitaMedicamento.medicamento_id)
+        .order_by(func.count().desc(), ReceitaMedicamento.medicamento_id)
+        .limit(top)
+    ).all()
+    catalogo = get_medicamento_catalog().get().by_id
+
+    return {
+        'total_pacientes': totais[0],
+        'total_medicamentos': totais[1],
+        'total_receitas': totais[2],
+        'total_receitas_emitidas': totais[3],
+        'periodo': periodo,
+        'receitas_por_periodo': [
+            {'periodo': label, 'total': por_periodo.get(label, 0)} for label in labels
+        ],
+        'medicamentos_mais_prescritos': [
+            {'medicamento': catalogo.get(medicamento_id), 'medicamento_id': medicamento_id, 'total': total}
+            for medicamento_id, total in mais_prescritos
+        ],
+    }
+
+
+@stats_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """Estatísticas do painel calculadas no banco (contagens e agregações)
+
+    Parâmetros: periodo (dia, mes ou ano), periodos (quantos períodos até o
+    atual) e top (quantos medicamentos mais prescritos). O resultado fica em
+    memória até a próxima gravação nas tabelas (ou a virada do período), e o
+    ETag permite ao navegador receber 304 nesse intervalo.
+    """
+    try:
+        periodo = request.args.get('periodo', 'mes')
+        if periodo not in PERIODOS:
+            return jsonify({'success': False, 'error': f'Período inválido: {periodo} (use dia, mes ou ano)'}), 400
+        quantidade_padrao = PERIODOS[periodo][1]
+
+        try:
+            quantidade = parse_limit(request.args.get('periodos'), quantidade_padrao, MAX_PERIODOS, name='periodos')
+            top = parse_limit(request.args.get('top'), DEFAULT_TOP_MEDICAMENTOS, MAX_TOP_MEDICAMENTOS, name='top')
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        labels = period_labels(periodo, quantidade, datetime.utcnow())
+        versions = table_versions(STATS_TABLES)
+        key = f"{periodo}|{quantidade}|{top}|{labels[-1]}|" + ','.join(f'{nome}:{versions[nome]}' for nome in STATS_TABLES)
+        etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+        if etag_matches(etag):
+            response = Response(status=304)
+        else:
+            with _stats_cache_lock:
+                data = _stats_cache.get(key)
+                if data is not None:
+                    _stats_cache.move_to_end(key)
+
+            if data is None:
+                data = compute_stats(periodo, labels, top)
+                with _stats_cache_lock:
+                    _stats_cache[key] = data
+                    while len(_stats_cache) > STATS_CACHE_SIZE:
+                        _stats_cache.popitem(last=False)
+
+            response = jsonify({'success': True, 'data': data})
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
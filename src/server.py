@@ -0,0 +1,212 @@
+import os
+import sys
+# Mesmo ajuste de caminho usado em main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import signal
+import subprocess
+import threading
+import time
+import _thread
+
+from src.utils.lifecycle import (
+    track_requests, register_shutdown_hook, run_shutdown_hooks, set_shutdown_handler
+)
+from src.utils.pdf_pool import shutdown_pdf_pool
+from src.utils.pdf_jobs import shutdown_pdf_jobs
+from src.utils.startup import STARTUP_PROFILE_ENV, start_background_warm_up, startup_report, warm_up
+
+# Padrões do servidor de produção (podem ser alterados por variáveis de ambiente)
+DEFAULT_HOST = os.environ.get('RECEITAS_HOST', '0.0.0.0')
+DEFAULT_PORT = int(os.environ.get('RECEITAS_PORT', 5001))
+DEFAULT_WORKERS = int(os.environ.get('RECEITAS_WORKERS', 1))
+DEFAULT_THREADS = int(os.environ.get('RECEITAS_THREADS', 8))
+DEFAULT_SHUTDOWN_TIMEOUT = int(os.environ.get('RECEITAS_SHUTDOWN_TIMEOUT', 30))
+
+# Módulos mostrados no relatório de --startup-profile
+STARTUP_PROFILE_TOP = 15
+
+# Separa, na saída de -X importtime, os imports da inicialização dos do aquecimento
+WARM_UP_MARKER = '--- aquecimento ---'
+
+
+def parse_args(argv=None):
+    """Opções de linha de comando (os padrões vêm das variáveis de ambiente)"""
+    parser = argparse.ArgumentParser(description='ReceitasPerobal - servidor de produção')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Processos (mais de 1 requer gunicorn, indisponível no Windows)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help='Threads por processo')
+    parser.add_argument('--shutdown-timeout', type=int, default=DEFAULT_SHUTDOWN_TIMEOUT,
+                        help='Segundos para aguardar requisições em andamento no encerramento')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='Medir o tempo de inicialização (imports e etapas) e sair sem abrir a porta')
+    return parser.parse_args(argv)
+
+
+def load_app():
+    """Carregar a aplicação (banco, índices e gerador de PDF) antes de servir"""
+    from src.main import app
+    register_shutdown_hook(shutdown_pdf_pool)
+    # Executado antes do pool: as tarefas em andamento ainda usam os processos de renderização
+    register_shutdown_hook(lambda: shutdown_pdf_jobs(app))
+    return app
+
+
+def serve_waitress(app, args):
+    """Servidor multi-thread em um processo (funciona em qualquer sistema)"""
+    from waitress import create_server
+
+    tracker = track_requests(app)
+    server = create_server(app, host=args.host, port=args.port, threads=args.threads)
+    # Porta já aberta: o navegador conecta enquanto o PDF e o catálogo carregam
+    start_background_warm_up(app)
+    state = {'stopping': False, 'drained': False}
+    lock = threading.Lock()
+
+    def drain_and_stop():
+        with lock:
+            if state['stopping']:
+                return
+            state['stopping'] = True
+
+        print('Encerrando: aguardando requisições em andamento...')
+        if not tracker.drain(args.shutdown_timeout):
+            print(f'Tempo esgotado; {tracker.active} requisição(ões) interrompida(s)')
+        run_shutdown_hooks()
+        state['drained'] = True
+        _thread.interrupt_main()  # Sai do loop do waitress (chama handle_signal)
+
+    def handle_signal(signum, frame):
+        # Segundo sinal, ou fim do drain: sair de fato
+        if state['drained'] or state['stopping']:
+            raise SystemExit(0)
+        threading.Thread(target=drain_and_stop, daemon=True).start()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, handle_signal)  # Fechar a janela do console no Windows
+    set_shutdown_handler(drain_and_stop)
+
+    print(f'Servidor em http://{args.host}:{args.port} ({args.threads} threads)')
+    server.run()
+
+
+def serve_gunicorn(app, args):
+    """Vários processos com gunicorn (Linux/macOS); o app é carregado antes do fork"""
+    from gunicorn.app.base import BaseApplication
+    from src.models.receitas_models import db
+
+    def post_fork(server, worker):
+        # Conexões abertas no processo principal não podem ser usadas pelos filhos
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+    def post_worker_init(worker):
+        # /api/shutdown encerra todos os processos pelo master (parada controlada)
+        set_shutdown_handler(lambda: os.kill(os.getppid(), signal.SIGTERM))
+        # Thread criada depois do fork (threads não sobrevivem ao fork)
+        start_background_warm_up(app)
+
+    def worker_exit(server, worker):
+        run_shutdown_hooks()
+
+    class ReceitasApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{args.host}:{args.port}')
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('preload_app', True)
+            self.cfg.set('graceful_timeout', args.shutdown_timeout)
+            self.cfg.set('timeout', 120)
+            self.cfg.set('post_fork', post_fork)
+            self.cfg.set('post_worker_init', post_worker_init)
+            self.cfg.set('worker_exit', worker_exit)
+
+        def load(self):
+            return app
+
+    ReceitasApplication().run()
+
+
+def profile_load_app():
+    """Carregar a aplicação e mostrar o tempo de cada etapa (processo de --startup-profile)"""
+    started = time.perf_counter()
+    app = load_app()
+    loaded = time.perf_counter() - started
+    print(WARM_UP_MARKER, file=sys.stderr, flush=True)
+    warm_up(app)
+    print('Etapas da inicialização:')
+    print(startup_report())
+    print(f"  {'total até aceitar conexões':<40} {loaded * 1000:8.1f} ms")
+
+
+def parse_import_times(stderr):
+    """Linhas de python -X importtime: [(módulo, próprio µs, acumulado µs)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def startup_profile():
+    """Medir a inicialização em um processo novo (com -X importtime) e mostrar o relatório"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, **{STARTUP_PROFILE_ENV: '1'})
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from src.server import profile_load_app; profile_load_app()'],
+        cwd=root, env=env, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        return result.returncode
+    startup_imports, _, warm_up_imports = result.stderr.partition(WARM_UP_MARKER)
+    modules = parse_import_times(startup_imports)
+
+    # Tempo próprio somado por pacote (ex.: reportlab, sqlalchemy, flask)
+    packages = {}
+    for name, own, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+
+    print(f'\nImports mais lentos (acumulado, de {len(modules)} módulos):')
+    for name, _, cumulative in sorted(modules, key=lambda module: -module[2])[:STARTUP_PROFILE_TOP]:
+        print(f'  {name:<40} {cumulative / 1000:8.1f} ms')
+    print('\nTempo de import por pacote:')
+    for package, own in sorted(packages.items(), key=lambda item: -item[1])[:STARTUP_PROFILE_TOP]:
+        print(f'  {package:<40} {own / 1000:8.1f} ms')
+
+    deferred = parse_import_times(warm_up_imports)
+    total = sum(own for _, own, _ in deferred) / 1000
+    print(f'\nImports adiados para o aquecimento em segundo plano: {len(deferred)} módulos, {total:.1f} ms')
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.startup_profile:
+        return startup_profile()
+
+    app = load_app()
+
+    if args.workers > 1 and os.name != 'nt':
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print('gunicorn não disponível; usando um processo com waitress')
+        else:
+            return serve_gunicorn(app, args)
+
+    return serve_waitress(app, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -203,24 +203,14 @@ function buscarPacientes() {
 
 async function exportarPacientesCSV() {
     try {
-        const response = await fetch(`${API_BASE}/pacientes/export`);
-        const data = await response.json();
+        // Download direto: o servidor envia o CSV (gzip) aos poucos
+        const a = document.createElement('a');
+        a.href = `${API_BASE}/pacientes/export?formato=csv&gzip=1`;
+        a.click();
         
-        if (data.success) {
-            const blob = new Blob([data.data], { type: 'text/csv' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = data.filename;
-            a.click();
-            window.URL.revokeObjectURL(url);
-            
-            showAlert('Arquivo CSV exportado com sucesso!', 'success');
-        } else {
-            showAlert('Erro ao exportar CSV: ' + data.error, 'danger');
-        }
+        showAlert('Exportação do CSV iniciada!', 'success');
     } catch (error) {
-        showAlert('Erro de conexão ao exportar CSV', 'danger');
+        showAlert('Erro ao exportar CSV', 'danger');
         console.error('Erro:', error);
     }
 }
@@ -229,36 +219,120 @@ async function importarPacientesCSV(event) {
     const file = event.target.files[0];
     if (!file) return;
     
-    const reader = new FileReader();
-    reader.onload = async function(e) {
-        try {
-            const response = await fetch(`${API_BASE}/pacientes/import`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    csv_content: e.target.result
-                })
-            });
-            
-            const data = await response.json();
+    // Limpar input
+    event.target.value = '';
+    
+    const data = await enviarCSVEmPartes('pacientes', file);
+    if (data) {
+        showAlert(data.message, 'success');
+        carregarPacientes();
+    }
+}
+
+// === IMPORTAÇÃO DE CSV EM PARTES ===
+
+// Tentativas por pedaço antes de desistir (quedas de conexão)
+const TENTATIVAS_POR_PEDACO = 5;
+
+async function enviarPedaco(envio, indice, pedaco) {
+    const response = await fetch(`${API_BASE}/imports/${envio}/chunks/${indice}`, {
+        method: 'PUT',
+        headers: {
+            'Content-Type': 'application/octet-stream'
+        },
+        body: pedaco
+    });
+    return { status: response.status, data: await response.json() };
+}
+
+function mostrarProgresso(aviso, texto) {
+    // Um único aviso atualizado a cada pedaço
+    if (!aviso) {
+        aviso = document.createElement('div');
+        aviso.className = 'alert alert-info';
+        const activeTab = document.querySelector('.tab-content.active');
+        activeTab.insertBefore(aviso, activeTab.firstChild);
+    }
+    aviso.textContent = texto;
+    return aviso;
+}
+
+async function enviarCSVEmPartes(tipo, file) {
+    // O arquivo é enviado em pedaços e importado no servidor à medida que chega;
+    // depois de uma queda de conexão o envio continua do pedaço esperado pelo servidor
+    let aviso = null;
+    try {
+        const abertura = await fetch(`${API_BASE}/imports`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ tipo: tipo, filename: file.name, total_bytes: file.size })
+        });
+        const envio = await abertura.json();
+        if (!envio.success) {
+            showAlert('Erro ao importar CSV: ' + envio.error, 'danger');
+            return null;
+        }
+        
+        const id = envio.data.id;
+        const tamanho = envio.data.chunk_size;
+        let indice = 0;
+        let tentativas = 0;
+        
+        while (indice * tamanho < file.size) {
+            const pedaco = file.slice(indice * tamanho, (indice + 1) * tamanho);
+            let resposta;
+            try {
+                resposta = await enviarPedaco(id, indice, pedaco);
+            } catch (error) {
+                if (++tentativas > TENTATIVAS_POR_PEDACO) throw error;
+                await new Promise(resolve => setTimeout(resolve, 1000 * tentativas));
+                // Confirmar com o servidor qual pedaço ele espera
+                const estado = await fetch(`${API_BASE}/imports/${id}`).then(r => r.json()).catch(() => null);
+                if (estado && estado.success) indice = estado.data.next_chunk;
+                continue;
+            }
             
-            if (data.success) {
-                showAlert(data.message, 'success');
-                carregarPacientes();
-            } else {
-                showAlert('Erro ao importar CSV: ' + data.error, 'danger');
+            if (resposta.status >= 500) {
+                // Pedaço não gravado (ex.: banco ocupado): o servidor continua esperando o mesmo pedaço
+                if (++tentativas > TENTATIVAS_POR_PEDACO) throw new Error(resposta.data.error);
+                await new Promise(resolve => setTimeout(resolve, 1000 * tentativas));
+                continue;
+            }
+            if (resposta.status === 409 && resposta.data.data && resposta.data.data.status === 'receiving') {
+                // Pedaço fora de ordem ou em processamento: retomar do pedaço esperado
+                if (++tentativas > TENTATIVAS_POR_PEDACO) throw new Error(resposta.data.error);
+                await new Promise(resolve => setTimeout(resolve, 1000 * tentativas));
+                indice = resposta.data.data.next_chunk;
+                continue;
             }
-        } catch (error) {
-            showAlert('Erro de conexão ao importar CSV', 'danger');
-            console.error('Erro:', error);
+            if (!resposta.data.success) {
+                showAlert('Erro ao importar CSV: ' + resposta.data.error, 'danger');
+                return null;
+            }
+            
+            tentativas = 0;
+            indice = resposta.data.data.next_chunk;
+            const estado = resposta.data.data;
+            aviso = mostrarProgresso(aviso, `Importando ${file.name}: ${Math.round(estado.progress * 100)}% (${estado.imported} importados)`);
         }
-    };
-    reader.readAsText(file);
-    
-    // Limpar input
-    event.target.value = '';
+        
+        aviso = mostrarProgresso(aviso, `Concluindo a importação de ${file.name}...`);        
+        const conclusao = await fetch(`${API_BASE}/imports/${id}/finish`, { method: 'POST' });
+        const resultado = await conclusao.json();
+        if (!resultado.success) {
+            showAlert('Erro ao importar CSV: ' + resultado.error, 'danger');
+            return null;
+        }
+        return resultado;
+    } catch (error) {
+        showAlert('Erro de conexão ao importar CSV', 'danger');
+        console.error('Erro:', error);
+        return null;
+    } finally {
+        if (aviso) aviso.remove();
+    }
 }
 
 // === FUNÇÕES DE MEDICAMENTOS ===
@@ -387,24 +461,14 @@ function buscarMedicamentos() {
 
 async function exportarMedicamentosCSV() {
     try {
-        const response = await fetch(`${API_BASE}/medicamentos/export`);
-        const data = await response.json();
+        // Download direto: o servidor envia o CSV (gzip) aos poucos
+        const a = document.createElement('a');
+        a.href = `${API_BASE}/medicamentos/export?formato=csv&gzip=1`;
+        a.click();
         
-        if (data.success) {
-            const blob = new Blob([data.data], { type: 'text/csv' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = data.filename;
-            a.click();
-            window.URL.revokeObjectURL(url);
-            
-            showAlert('Arquivo CSV exportado com sucesso!', 'success');
-        } else {
-            showAlert('Erro ao exportar CSV: ' + data.error, 'danger');
-        }
+        showAlert('Exportação do CSV iniciada!', 'success');
     } catch (error) {
-        showAlert('Erro de conexão ao exportar CSV', 'danger');
+        showAlert('Erro ao exportar CSV', 'danger');
         console.error('Erro:', error);
     }
 }
@@ -413,36 +477,14 @@ async function importarMedicamentosCSV(event) {
     const file = event.target.files[0];
     if (!file) return;
     
-    const reader = new FileReader();
-    reader.onload = async function(e) {
-        try {
-            const response = await fetch(`${API_BASE}/medicamentos/import`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    csv_content: e.target.result
-                })
-            });
-            
-            const data = await response.json();
-            
-            if (data.success) {
-                showAlert(data.message, 'success');
-                carregarMedicamentos();
-            } else {
-                showAlert('Erro ao importar CSV: ' + data.error, 'danger');
-            }
-        } catch (error) {
-            showAlert('Erro de conexão ao importar CSV', 'danger');
-            console.error('Erro:', error);
-        }
-    };
-    reader.readAsText(file);
-    
     // Limpar input
     event.target.value = '';
+    
+    const data = await enviarCSVEmPartes('medicamentos', file);
+    if (data) {
+        showAlert(data.message, 'success');
+        carregarMedicamentos();
+    }
 }
 
 async function popularMedicamentosTeste() {
@@ -649,18 +691,28 @@ async function gerarReceitaPDF() {
 
 async function atualizarEstatisticas() {
     try {
-        const [pacientesResp, medicamentosResp] = await Promise.all([
-            fetch(`${API_BASE}/pacientes`),
-            fetch(`${API_BASE}/medicamentos`)
-        ]);
+        // Contagens e agregações feitas no servidor (sem baixar as listas completas)
+        const response = await fetch(`${API_BASE}/stats?periodo=mes&periodos=6&top=5`);
+        const data = await response.json();
+        const stats = data.success ? data.data : null;
+        
+        const receitasPorMes = stats ? stats.receitas_por_periodo.map(item => `
+            <li>${item.periodo}: ${item.total}</li>
+        `).join('') : '';
         
-        const pacientesData = await pacientesResp.json();
-        const medicamentosData = await medicamentosResp.json();
+        const maisPrescritos = stats ? stats.medicamentos_mais_prescritos.map(item => `
+            <li>${item.medicamento ? item.medicamento.denominacao_generica : `Medicamento ${item.medicamento_id}`} (${item.total})</li>
+        `).join('') : '';
         
         const estatisticas = document.getElementById('estatisticasGerais');
         estatisticas.innerHTML = `
-            <p><strong>Pacientes cadastrados:</strong> ${pacientesData.success ? pacientesData.total : 0}</p>
-            <p><strong>Medicamentos cadastrados:</strong> ${medicamentosData.success ? medicamentosData.total : 0}</p>
+            <p><strong>Pacientes cadastrados:</strong> ${stats ? stats.total_pacientes : 0}</p>
+            <p><strong>Medicamentos cadastrados:</strong> ${stats ? stats.total_medicamentos : 0}</p>
+            <p><strong>Receitas cadastradas:</strong> ${stats ? stats.total_receitas : 0} (${stats ? stats.total_receitas_emitidas : 0} vias emitidas)</p>
+            <p><strong>Receitas por mês:</strong></p>
+            <ul>${receitasPorMes}</ul>
+            <p><strong>Medicamentos mais prescritos:</strong></p>
+            <ol>${maisPrescritos}</ol>
             <p><strong>Sistema:</strong> ReceitasPerobal v3.0</p>
             <p><strong>Última atualização:</strong> ${new Date().toLocaleString('pt-BR')}</p>
         `;
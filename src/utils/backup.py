@@ -0,0 +1,202 @@
+import os
+import sqlite3
+import tempfile
+import zlib
+from datetime import datetime
+from src.models.receitas_models import db
+
+# Leitura/gravação em blocos (o banco nunca é carregado inteiro na memória)
+BACKUP_CHUNK_SIZE = 1024 * 1024
+
+# gzip nível 1: cerca de 4x mais rápido que o nível 6 para só ~20% a mais de tamanho
+BACKUP_COMPRESS_LEVEL = 1
+
+# wbits do zlib para o formato gzip (cabeçalho e CRC)
+GZIP_WBITS = 31
+
+GZIP_MAGIC = b'\x1f\x8b'
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+# Tabelas que um backup precisa ter para ser restaurado
+REQUIRED_TABLES = ('pacientes', 'medicamentos', 'receitas', 'receita_medicamentos')
+
+# Sufixo da cópia do banco atual feita antes de cada restauração
+PRE_RESTORE_SUFFIX = '.antes_restauracao'
+
+
+class BackupError(Exception):
+    """Backup inválido ou banco que não permite backup/restauração"""
+
+
+def backup_filename(now=None):
+    """Nome padrão do arquivo de backup (comprimido)"""
+    now = now or datetime.now()
+    return f'receitas_perobal_backup_{now.strftime("%Y%m%d_%H%M%S")}.db.gz'
+
+
+def database_path():
+    """Caminho do arquivo do banco em uso (só SQLite em arquivo)"""
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise BackupError('Backup disponível apenas para banco SQLite em arquivo')
+    return os.path.abspath(url.database)
+
+
+def snapshot_database(dest_path):
+    """Copiar o banco em uso para dest_path com a API de backup online do SQLite
+
+    A cópia é feita em uma única etapa, dentro de uma transação de leitura:
+    o resultado é um retrato consistente do banco. No modo WAL (perfil
+    producao) leitores não bloqueiam gravações, então o sistema continua
+    gravando normalmente durante o backup.
+    """
+    database_path()
+    raw = db.engine.raw_connection()
+    try:
+        target = sqlite3.connect(dest_path)
+        try:
+            raw.driver_connection.backup(target)
+        finally:
+            target.close()
+    finally:
+        raw.close()
+    return dest_path
+
+
+def iter_compressed(path, remove=False, chunk_size=BACKUP_CHUNK_SIZE):
+    """Conteúdo do arquivo comprimido em gzip, bloco a bloco (para respostas transmitidas)"""
+    compressor = zlib.compressobj(BACKUP_COMPRESS_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    try:
+        with open(path, 'rb') as source:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+        yield compressor.flush()
+    finally:
+        if remove:
+            remove_database_file(path)
+
+
+def remove_database_file(path):
+    """Apagar um arquivo de banco temporário e os arquivos -wal/-shm que o SQLite criou ao lado"""
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+def create_backup_snapshot():
+    """Retrato do banco em um arquivo temporário (o chamador apaga o arquivo)"""
+    fd, path = tempfile.mkstemp(prefix='receitas_backup_', suffix='.db')
+    os.close(fd)
+    try:
+        return snapshot_database(path)
+    except Exception:
+        remove_database_file(path)
+        raise
+
+
+def write_backup(dest_path):
+    """Gravar um backup comprimido em dest_path (linha de comando)"""
+    snapshot = create_backup_snapshot()
+    temp_path = dest_path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as dest:
+            for chunk in iter_compressed(snapshot):
+                dest.write(chunk)
+        os.replace(temp_path, dest_path)
+    finally:
+        remove_database_file(snapshot)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return dest_path
+
+
+def extract_backup(stream, dest_path, chunk_size=BACKUP_CHUNK_SIZE):
+    """Gravar em dest_path o banco enviado em stream (.db ou .db.gz), bloco a bloco"""
+    first = stream.read(chunk_size)
+    decompressor = zlib.decompressobj(GZIP_WBITS) if first.startswith(GZIP_MAGIC) else None
+    try:
+        with open(dest_path, 'wb') as dest:
+            chunk = first
+            while chunk:
+                dest.write(decompressor.decompress(chunk) if decompressor else chunk)
+                chunk = stream.read(chunk_size)
+            if decompressor:
+                dest.write(decompressor.flush())
+                if not decompressor.eof:
+                    raise BackupError('Arquivo de backup incompleto (gzip truncado)')
+    except zlib.error as e:
+        raise BackupError(f'Arquivo de backup corrompido: {e}')
+    return dest_path
+
+
+def verify_backup(path):
+    """Conferir o arquivo (cabeçalho, PRAGMA integrity_check e tabelas) e contar os registros"""
+    with open(path, 'rb') as backup_file:
+        if backup_file.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+            raise BackupError('O arquivo não é um banco de dados SQLite')
+
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        problems = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+        if problems != ['ok']:
+            raise BackupError('Banco de dados corrompido: ' + '; '.join(problems[:5]))
+
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [table for table in REQUIRED_TABLES if table not in tables]
+        if missing:
+            raise BackupError(f'Backup sem as tabelas: {", ".join(missing)}')
+
+        return {table: conn.execute(f'SELECT count(*) FROM {table}').fetchone()[0] for table in REQUIRED_TABLES}
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f'Banco de dados inválido: {e}')
+    finally:
+        conn.close()
+
+
+def restore_backup(path):
+    """Substituir o conteúdo do banco em uso pelo backup em path (já extraído)
+
+    O backup é conferido antes; o banco atual é copiado para
+    <banco>.antes_restauracao e então sobrescrito pela API de backup do
+    SQLite, que grava tudo em uma única transação: as outras conexões veem o
+    banco antigo ou o restaurado, nunca uma mistura. Depois aplica as
+    migrações pendentes (backup de versão anterior), o índice de busca e
+    incrementa a versão de todas as tabelas. Deve ser chamado dentro do
+    app_context. Retorna a contagem de registros restaurados.
+    """
+    from flask import current_app
+    from src.utils.migrations import run_migrations
+    from src.utils.search_index import init_search_index
+    from src.utils.table_versions import table_versions, bump_table_versions
+    from src.utils.medicamento_catalog import invalidate_medicamento_catalog
+
+    counts = verify_backup(path)
+    live_path = database_path()
+
+    # Versões atuais: depois da restauração todas ficam acima delas (ETags antigos deixam de valer)
+    db.session.remove()
+    previous = table_versions(list(db.metadata.tables))
+    db.session.remove()
+    snapshot_database(live_path + PRE_RESTORE_SUFFIX)
+
+    source = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    raw = db.engine.raw_connection()
+    try:
+        source.backup(raw.driver_connection)
+    finally:
+        raw.close()
+        source.close()
+
+    run_migrations(verbose=False)
+    # Backup pode ter sido editado fora do sistema: conferir as contagens do índice
+    init_search_index(current_app, verify=True)
+    bump_table_versions(previous)
+    invalidate_medicamento_catalog()
+    return counts
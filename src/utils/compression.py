@@ -0,0 +1,101 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Opcional: sem brotli só gzip é oferecido
+    brotli = None
+
+# Respostas menores que isso não compensam ser comprimidas
+DEFAULT_COMPRESS_MIN_SIZE = 1024
+
+# Níveis pensados para respostas dinâmicas (rápidos, boa taxa em JSON)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'image/svg+xml',
+}
+
+
+def available_encodings():
+    """Codificações suportadas, na ordem de preferência do servidor"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding):
+    """Comprimir o corpo inteiro na codificação escolhida"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def etag_matches(etag):
+    """If-None-Match confere com o ETag, em qualquer uma das versões comprimidas
+
+    Respostas comprimidas recebem o ETag com sufixo (ex.: "abc-gzip"), pois um
+    ETag forte identifica os bytes enviados.
+    """
+    if_none_match = request.if_none_match
+    return etag in if_none_match or any(
+        f'{etag}-{encoding}' in if_none_match for encoding in available_encodings()
+    )
+
+
+def compress_response(response, min_size=DEFAULT_COMPRESS_MIN_SIZE):
+    """Comprimir a resposta com gzip ou brotli, conforme o Accept-Encoding do cliente
+
+    Ignora respostas transmitidas aos poucos ou de arquivos (CSV, PDF, estáticos),
+    respostas já codificadas e corpos menores que min_size.
+    """
+    etag, weak = response.get_etag()
+
+    if response.status_code == 304:
+        # Devolver o mesmo ETag (com sufixo) que o cliente enviou
+        if etag and not weak:
+            for encoding in available_encodings():
+                if f'{etag}-{encoding}' in request.if_none_match:
+                    response.set_etag(f'{etag}-{encoding}')
+                    break
+        return response
+
+    if (
+        response.status_code < 200
+        or response.status_code == 204
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or request.method == 'HEAD'
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def init_compression(app):
+    """Comprimir as respostas da aplicação (limite em COMPRESS_MIN_SIZE)"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE)
+
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, min_size)
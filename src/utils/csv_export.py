@@ -0,0 +1,72 @@
+import csv
+import io
+import zlib
+from flask import Response, request, stream_with_context
+from src.models.receitas_models import db
+
+# Linhas lidas do banco por vez e linhas por pedaço enviado ao cliente
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_csv(header, rows, batch_size=EXPORT_BATCH_SIZE):
+    """Gerar o CSV em pedaços de texto, sem montar o arquivo inteiro em memória"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_gzip(chunks):
+    """Comprimir um fluxo de texto em gzip, pedaço por pedaço"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_query_rows(statement, formatter, batch_size=EXPORT_BATCH_SIZE):
+    """Ler as linhas da consulta em lotes (yield_per) e formatá-las para o CSV"""
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        for row in result:
+            yield formatter(row)
+    finally:
+        result.close()
+
+
+def gzip_requested():
+    """Cliente pediu gzip=1 e aceita Content-Encoding gzip"""
+    return request.args.get('gzip') == '1' and 'gzip' in request.accept_encodings
+
+
+def csv_response(filename, header, rows, compress=False):
+    """Resposta text/csv transmitida aos poucos, opcionalmente com gzip
+
+    rows é um iterador (por exemplo, de iter_query_rows); a leitura do banco
+    acontece enquanto a resposta é enviada.
+    """
+    chunks = iter_csv(header, rows)
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+
+    if compress:
+        body = iter_gzip(chunks)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    else:
+        body = (chunk.encode('utf-8') for chunk in chunks)
+
+    return Response(
+        stream_with_context(body),
+        mimetype='text/csv',
+        headers=headers
+    )
@@ -0,0 +1,209 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.receitas_models import db, Paciente, Medicamento
+
+# Linhas validadas e gravadas por transação
+IMPORT_CHUNK_SIZE = 5000
+
+# Quantidade de valores por consulta IN (SQLite antigo aceita até 999 parâmetros)
+LOOKUP_BATCH_SIZE = 900
+
+# Limite de mensagens de erro devolvidas na resposta
+MAX_REPORTED_ERRORS = 1000
+
+
+class BatchImporter(ABC):
+    """Base dos importadores de CSV: linhas acumuladas e gravadas em lotes
+
+    As subclasses implementam flush(), que valida e grava self.pending (pares
+    de número da linha e dicionário do csv.DictReader). Com commit=True cada
+    lote é confirmado na sua transação; com commit=False tudo fica na
+    transação da sessão e quem chamou faz o commit (ou o rollback) no fim.
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE, commit=True):
+        self.chunk_size = chunk_size
+        self.commit = commit
+        self.pending = []
+        self.processed = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, message):
+        """Registrar erro de uma linha (as mensagens são limitadas)"""
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def feed(self, rows, start=2):
+        """Adicionar linhas do CSV (start é o número da primeira linha no arquivo)"""
+        for row_num, row in enumerate(rows, start=start):
+            self.pending.append((row_num, row))
+            if len(self.pending) >= self.chunk_size:
+                self.flush()
+
+    def finish(self):
+        """Gravar o que restou e retornar o resumo da importação"""
+        self.flush()
+        return self.result()
+
+    def result(self):
+        """Resumo da importação até o momento"""
+        return {
+            'processed': self.processed,
+            'imported': self.imported,
+            'error_count': self.error_count,
+            'errors': self.errors
+        }
+
+    @abstractmethod
+    def flush(self):
+        """Validar e gravar o lote pendente"""
+
+    def write(self, statement, rows):
+        """Executar o INSERT do lote (e confirmar, com commit=True); desfaz a transação em caso de erro"""
+        try:
+            result = db.session.execute(statement, rows)
+            if self.commit:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return result
+
+
+class PacienteImporter(BatchImporter):
+    """Importação de pacientes em massa, em lotes
+
+    As linhas (dicionários do csv.DictReader) são validadas em lotes; os CPFs
+    de cada lote são comparados com os já vistos no arquivo e com o banco em
+    uma única consulta, e os novos pacientes são gravados com um único
+    INSERT ... ON CONFLICT DO NOTHING por lote, cada um em sua transação.
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE, commit=True):
+        super().__init__(chunk_size, commit)
+        self.seen_cpfs = set()
+        self.duplicated = 0
+
+    def result(self):
+        """Resumo da importação até o momento"""
+        return {**super().result(), 'duplicated': self.duplicated}
+
+    def flush(self):
+        """Validar, remover duplicatas e gravar o lote pendente"""
+        chunk, self.pending = self.pending, []
+        if not chunk:
+            return
+        self.processed += len(chunk)
+
+        # Validação das linhas
+        valid = []
+        for row_num, row in chunk:
+            try:
+                nome = (row.get('Nome Completo') or '').strip()
+                cpf = (row.get('CPF') or '').strip()
+                data_nasc = (row.get('Data Nascimento') or '').strip()
+
+                if not nome:
+                    self.add_error(f'Linha {row_num}: Nome é obrigatório')
+                    continue
+
+                # Processar data
+                data_nascimento = None
+                if data_nasc:
+                    try:
+                        data_nascimento = datetime.strptime(data_nasc, '%Y-%m-%d').date()
+                    except ValueError:
+                        self.add_error(f'Linha {row_num}: Data inválida ({data_nasc})')
+                        continue
+
+                valid.append({
+                    'nome_completo': nome,
+                    'cpf': cpf if cpf else None,
+                    'data_nascimento': data_nascimento
+                })
+            except Exception as e:
+                self.add_error(f'Linha {row_num}: {str(e)}')
+
+        # Duplicatas dentro do próprio arquivo
+        new_rows = []
+        chunk_cpfs = []
+        for paciente in valid:
+            cpf = paciente['cpf']
+            if cpf:
+                if cpf in self.seen_cpfs:
+                    self.duplicated += 1
+                    continue
+                self.seen_cpfs.add(cpf)
+                chunk_cpfs.append(cpf)
+            new_rows.append(paciente)
+
+        # Duplicatas no banco: uma consulta por lote
+        existing = set()
+        for i in range(0, len(chunk_cpfs), LOOKUP_BATCH_SIZE):
+            batch = chunk_cpfs[i:i + LOOKUP_BATCH_SIZE]
+            existing.update(db.session.execute(select(Paciente.cpf).where(Paciente.cpf.in_(batch))).scalars())
+
+        if existing:
+            before = len(new_rows)
+            new_rows = [paciente for paciente in new_rows if paciente['cpf'] not in existing]
+            self.duplicated += before - len(new_rows)
+
+        if not new_rows:
+            return
+
+        # Inserção em lote; CPFs gravados por outra requisição no meio tempo são ignorados
+        created_at = datetime.utcnow()
+        for paciente in new_rows:
+            paciente['created_at'] = created_at
+
+        statement = sqlite_insert(Paciente.__table__).on_conflict_do_nothing(index_elements=['cpf'])
+        result = self.write(statement, new_rows)
+
+        inserted = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(new_rows)
+        self.imported += inserted
+        self.duplicated += len(new_rows) - inserted
+
+
+class MedicamentoImporter(BatchImporter):
+    """Importação de medicamentos em massa: um INSERT por lote, cada lote em sua transação"""
+
+    def flush(self):
+        """Validar e gravar o lote pendente"""
+        chunk, self.pending = self.pending, []
+        if not chunk:
+            return
+        self.processed += len(chunk)
+
+        new_rows = []
+        for row_num, row in chunk:
+            try:
+                denominacao = (row.get('Denominação Genérica') or '').strip()
+                concentracao = (row.get('Concentração') or '').strip()
+                apresentacao = (row.get('Apresentação') or '').strip()
+
+                if not denominacao:
+                    self.add_error(f'Linha {row_num}: Denominação genérica é obrigatória')
+                    continue
+
+                new_rows.append({
+                    'denominacao_generica': denominacao,
+                    'concentracao': concentracao if concentracao else None,
+                    'apresentacao': apresentacao if apresentacao else None
+                })
+            except Exception as e:
+                self.add_error(f'Linha {row_num}: {str(e)}')
+
+        if not new_rows:
+            return
+
+        created_at = datetime.utcnow()
+        for medicamento in new_rows:
+            medicamento['created_at'] = created_at
+
+        self.write(sqlite_insert(Medicamento.__table__), new_rows)
+        self.imported += len(new_rows)
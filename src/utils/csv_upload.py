@@ -0,0 +1,338 @@
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete
+from src.models.receitas_models import db, EnvioImportacao
+from src.utils.csv_import import PacienteImporter, MedicamentoImporter, MAX_REPORTED_ERRORS
+from src.utils.medicamento_catalog import invalidate_medicamento_catalog
+from src.utils.metrics import observe_import
+
+# Tamanho sugerido e máximo de cada pedaço enviado
+DEFAULT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Envios sem atualização há mais que isso são apagados (segundos)
+DEFAULT_UPLOAD_TTL = 24 * 3600
+
+# Trava de um envio abandonada por um processo que caiu (segundos)
+LOCK_TIMEOUT = 300
+
+# Intervalo mínimo entre limpezas dos envios expirados
+CLEANUP_INTERVAL = 60
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Importador de cada tipo aceito
+IMPORTERS = {
+    'pacientes': PacienteImporter,
+    'medicamentos': MedicamentoImporter,
+}
+
+# Campos internos do estado, fora da resposta
+INTERNAL_FIELDS = ('fieldnames', 'seconds')
+
+
+class UploadNotFound(Exception):
+    """Envio inexistente ou expirado"""
+
+
+class UploadConflict(Exception):
+    """Pedaço fora de ordem, envio em processamento, finalizado ou incompleto"""
+
+    def __init__(self, message, state=None):
+        super().__init__(message)
+        self.state = state
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def split_records(data):
+    """Separar os registros completos do CSV (até a última quebra de linha fora de aspas) do resto
+
+    Trabalha com os bytes: aspas e quebras de linha nunca fazem parte de um
+    caractere UTF-8 de mais de um byte, então um pedaço cortado no meio de um
+    caractere fica inteiro no resto.
+    """
+    if b'"' not in data:
+        end = data.rfind(b'\n') + 1
+        return data[:end], data[end:]
+
+    end = pos = quotes = 0
+    while True:
+        newline = data.find(b'\n', pos)
+        if newline < 0:
+            break
+        quotes += data.count(b'"', pos, newline)
+        if quotes % 2 == 0:
+            end = newline + 1
+        pos = newline + 1
+    return data[:end], data[end:]
+
+
+def public_state(state):
+    """Estado do envio sem os campos internos"""
+    return {key: value for key, value in state.items() if key not in INTERNAL_FIELDS}
+
+
+class ImportUploadStore:
+    """Envios de CSV em pedaços, importados à medida que chegam
+
+    O cliente abre um envio (create), manda os pedaços numerados a partir de 0
+    (add_chunk) e finaliza (finish). Cada pedaço é importado na hora, em uma
+    única transação: as linhas dos registros completos, o estado do envio
+    (next_chunk e contagens) e o fim incompleto do último registro ficam na
+    tabela envios_importacao e são confirmados juntos. Se o pedaço falhar
+    (ex.: banco ocupado) nada dele fica gravado e o envio continua esperando o
+    mesmo pedaço; se a resposta se perder depois do commit, o reenvio é
+    reconhecido pelo next_chunk e ignorado. Pedaço adiantado é recusado com o
+    número esperado, então o cliente retoma o envio depois de uma queda de
+    conexão a partir de next_chunk. Como o estado está no banco, qualquer
+    processo do servidor recebe o próximo pedaço ou responde o progresso; o
+    diretório guarda só as travas (<id>.lock) que impedem dois processos de
+    importar o mesmo envio ao mesmo tempo.
+    """
+
+    def __init__(self, directory, ttl=DEFAULT_UPLOAD_TTL, max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_chunk_bytes = max_chunk_bytes
+        self.last_cleanup = 0
+        self.lock = threading.Lock()
+
+    def _path(self, upload_id, extension):
+        return os.path.join(self.directory, f'{upload_id}.{extension}')
+
+    @contextmanager
+    def _locked(self, upload_id):
+        """Um pedaço por vez em cada envio, entre todos os processos (arquivo <id>.lock)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(upload_id, 'lock')
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                stale = time.time() - os.path.getmtime(path) > LOCK_TIMEOUT
+            except OSError:
+                stale = True
+            if not stale:
+                raise UploadConflict('Outro pedaço deste envio está em processamento; tente novamente')
+            os.remove(path)
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _load(self, upload_id):
+        """Registro do envio e o estado decodificado"""
+        envio = db.session.get(EnvioImportacao, upload_id) if UPLOAD_ID_PATTERN.match(upload_id or '') else None
+        if envio is None:
+            raise UploadNotFound('Envio não encontrado ou expirado')
+        return envio, json.loads(envio.estado)
+
+    def _save(self, envio, state, resto):
+        """Anotar estado e resto no registro (gravados no commit de quem chamou)"""
+        state['updated_at'] = _now()
+        envio.estado = json.dumps(state, ensure_ascii=False)
+        envio.resto = resto or None
+        envio.updated_at = datetime.utcnow()
+
+    def create(self, tipo, filename=None, total_bytes=None):
+        """Abrir um envio e retornar o estado inicial"""
+        if tipo not in IMPORTERS:
+            raise ValueError(f'Tipo de importação inválido: {tipo} (use {" ou ".join(IMPORTERS)})')
+        if total_bytes is not None and (not isinstance(total_bytes, int) or total_bytes < 0):
+            raise ValueError('total_bytes deve ser um inteiro positivo')
+        self.cleanup()
+
+        state = {
+            'id': uuid.uuid4().hex,
+            'tipo': tipo,
+            'filename': filename,
+            'status': 'receiving',
+            'next_chunk': 0,
+            'bytes_received': 0,
+            'total_bytes': total_bytes,
+            'progress': 0.0 if total_bytes else None,
+            'chunk_size': DEFAULT_UPLOAD_CHUNK_SIZE,
+            'max_chunk_bytes': self.max_chunk_bytes,
+            # Contadores do resumo do importador (processed, imported, ...), somados a cada pedaço
+            **IMPORTERS[tipo]().result(),
+            'created_at': _now(),
+            'finished_at': None,
+            'fieldnames': None,
+            'seconds': 0.0,
+        }
+        envio = EnvioImportacao(id=state['id'])
+        self._save(envio, state, None)
+        db.session.add(envio)
+        db.session.commit()
+        return public_state(state)
+
+    def get(self, upload_id):
+        """Estado e progresso do envio (None se não existir ou já expirou)"""
+        self.cleanup()
+        try:
+            return public_state(self._load(upload_id)[1])
+        except UploadNotFound:
+            return None
+
+    def _import(self, state, data):
+        """Importar os registros completos em data (bytes), sem commit, e somar o resultado ao estado"""
+        if not data:
+            return
+        text = data.decode('utf-8', errors='replace')
+        if state['fieldnames'] is None and text.startswith('\ufeff'):
+            text = text[1:]
+
+        started = time.perf_counter()
+        reader = csv.DictReader(io.StringIO(text, newline=''), fieldnames=state['fieldnames'])
+        importer = IMPORTERS[state['tipo']](commit=False)
+        importer.feed(reader, start=state['processed'] + 2)
+        result = importer.finish()
+
+        state['fieldnames'] = reader.fieldnames
+        state['seconds'] += time.perf_counter() - started
+        for key, value in result.items():
+            if key != 'errors':
+                state[key] += value
+        state['errors'].extend(result['errors'][:MAX_REPORTED_ERRORS - len(state['errors'])])
+
+    def _commit(self, state):
+        """Confirmar as linhas do pedaço junto com o estado do envio"""
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if state['tipo'] == 'medicamentos':
+            invalidate_medicamento_catalog()
+
+    def add_chunk(self, upload_id, index, data):
+        """Receber o pedaço index e importar, em uma transação, os registros que ficaram completos"""
+        if len(data) > self.max_chunk_bytes:
+            raise ValueError(f'Pedaço maior que o limite de {self.max_chunk_bytes} bytes')
+
+        with self._locked(upload_id):
+            envio, state = self._load(upload_id)
+            if state['status'] != 'receiving':
+                raise UploadConflict('Envio já finalizado', public_state(state))
+            if index < state['next_chunk']:
+                # Reenvio de um pedaço já importado (a resposta anterior se perdeu)
+                return public_state(state)
+            if index > state['next_chunk']:
+                raise UploadConflict(f'Pedaço fora de ordem: esperado {state["next_chunk"]}', public_state(state))
+
+            records, tail = split_records((envio.resto or b'') + data)
+            try:
+                self._import(state, records)
+            except Exception:
+                db.session.rollback()
+                raise
+
+            state['next_chunk'] += 1
+            state['bytes_received'] += len(data)
+            if state['total_bytes']:
+                state['progress'] = round(min(state['bytes_received'] / state['total_bytes'], 1.0), 4)
+            self._save(envio, state, tail)
+            self._commit(state)
+            return public_state(state)
+
+    def finish(self, upload_id):
+        """Importar o último registro, concluir o envio e retornar o resumo"""
+        with self._locked(upload_id):
+            envio, state = self._load(upload_id)
+            if state['status'] == 'done':
+                return public_state(state)
+            if state['total_bytes'] is not None and state['bytes_received'] != state['total_bytes']:
+                raise UploadConflict(
+                    f'Arquivo incompleto: recebidos {state["bytes_received"]} de {state["total_bytes"]} bytes',
+                    public_state(state)
+                )
+
+            try:
+                self._import(state, envio.resto)
+            except Exception:
+                db.session.rollback()
+                raise
+
+            state.update(status='done', progress=1.0, finished_at=_now())
+            self._save(envio, state, None)
+            self._commit(state)
+            observe_import(state['tipo'], state, state['seconds'])
+            return public_state(state)
+
+    def cancel(self, upload_id):
+        """Apagar o envio (linhas já importadas continuam no banco); False se não existir"""
+        with self._locked(upload_id):
+            try:
+                envio, _ = self._load(upload_id)
+            except UploadNotFound:
+                return False
+            db.session.delete(envio)
+            db.session.commit()
+            return True
+
+    def cleanup(self, force=False):
+        """Apagar envios e travas sem atualização há mais de ttl segundos"""
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_cleanup < CLEANUP_INTERVAL:
+                return
+            self.last_cleanup = now
+
+        limite = datetime.utcnow() - timedelta(seconds=self.ttl)
+        try:
+            db.session.execute(delete(EnvioImportacao).where(EnvioImportacao.updated_at < limite))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'Erro ao limpar envios de importação expirados: {e}')
+
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass  # Apagado por outro processo
+
+
+def init_import_uploads(app):
+    """Criar o armazenamento de envios conforme IMPORT_UPLOADS_DIR (travas), IMPORT_UPLOAD_TTL e IMPORT_MAX_CHUNK_BYTES"""
+    directory = app.config.get('IMPORT_UPLOADS_DIR') or os.path.join(tempfile.gettempdir(), 'receitas_import_uploads')
+    store = ImportUploadStore(
+        directory,
+        ttl=app.config.get('IMPORT_UPLOAD_TTL', DEFAULT_UPLOAD_TTL),
+        max_chunk_bytes=app.config.get('IMPORT_MAX_CHUNK_BYTES', DEFAULT_MAX_CHUNK_BYTES)
+    )
+    app.extensions['import_uploads'] = store
+    return store
+
+
+def get_import_uploads():
+    """Envios da aplicação atual (criado na primeira chamada, se necessário)"""
+    store = current_app.extensions.get('import_uploads')
+    if store is None:
+        store = init_import_uploads(current_app)
+    return store
@@ -0,0 +1,86 @@
+import os
+from sqlalchemy import event
+from src.models.receitas_models import db
+
+# Perfis de configuração do SQLite
+#   pragmas: aplicados em toda nova conexão
+#   engine: opções do SQLAlchemy (pool de conexões)
+DATABASE_PROFILES = {
+    # Configuração original do SQLite (journal em modo DELETE, sem ajustes)
+    'padrao': {
+        'pragmas': {},
+        'engine': {},
+    },
+    # Leitores não bloqueiam durante importações e gravações concorrentes esperam em vez de falhar
+    'producao': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',        # Seguro com WAL e bem mais rápido que FULL
+            'cache_size': -64000,           # ~64 MB de cache de páginas por conexão
+            'mmap_size': 268435456,         # 256 MB de leitura via memória mapeada
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,           # Esperar até 5 s por um lock antes de erro
+        },
+        'engine': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_pre_ping': True,
+            'connect_args': {'check_same_thread': False, 'timeout': 5},
+        },
+    },
+}
+
+DEFAULT_DATABASE_PROFILE = 'producao'
+
+
+def configure_database(app, default_path):
+    """Definir URI e opções do banco a partir do perfil escolhido
+
+    Variáveis de ambiente (ou a mesma chave em app.config):
+      RECEITAS_DATABASE_URI  URI completa (padrão: sqlite:///<default_path>)
+      RECEITAS_DB_PROFILE    perfil em DATABASE_PROFILES (padrão: producao)
+      RECEITAS_DB_POOL_SIZE  tamanho do pool de conexões
+
+    Deve ser chamado antes de db.init_app(app).
+    """
+    profile_name = app.config.get('RECEITAS_DB_PROFILE') or os.environ.get('RECEITAS_DB_PROFILE', DEFAULT_DATABASE_PROFILE)
+    if profile_name not in DATABASE_PROFILES:
+        raise ValueError(f'Perfil de banco desconhecido: {profile_name}')
+    profile = DATABASE_PROFILES[profile_name]
+
+    uri = app.config.get('RECEITAS_DATABASE_URI') or os.environ.get('RECEITAS_DATABASE_URI') or f"sqlite:///{default_path}"
+
+    engine_options = dict(profile['engine'])
+    pool_size = os.environ.get('RECEITAS_DB_POOL_SIZE')
+    if pool_size and 'pool_size' in engine_options:
+        engine_options['pool_size'] = int(pool_size)
+
+    # Banco em memória usa um pool próprio do SQLAlchemy, sem tamanho configurável
+    if uri in ('sqlite://', 'sqlite:///:memory:'):
+        engine_options = {}
+
+    app.config['RECEITAS_DB_PROFILE'] = profile_name
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+    return profile_name
+
+
+def apply_pragmas(app):
+    """Registrar os PRAGMAs do perfil em toda nova conexão do engine
+
+    Deve ser chamado dentro do app_context, logo após db.init_app(app) e
+    antes de qualquer consulta.
+    """
+    pragmas = DATABASE_PROFILES[app.config['RECEITAS_DB_PROFILE']]['pragmas']
+    if not pragmas or db.engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(db.engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,64 @@
+import os
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # Opcional: sem orjson usa o codificador padrão do Python
+    orjson = None
+
+# Provedores disponíveis (RECEITAS_JSON_PROVIDER): auto usa orjson se instalado
+JSON_PROVIDERS = ('auto', 'orjson', 'padrao')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Codificador padrão do Flask, com datas no formato ISO (igual ao orjson)"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (date, datetime, time)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonProvider(JSONProvider):
+    """Codificação com orjson: datas, datetimes e UUIDs direto, sem conversão em Python
+
+    As chaves continuam ordenadas, como no provedor padrão do Flask.
+    """
+
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    @staticmethod
+    def default(o):
+        # Tipos que o orjson não conhece (ex.: Decimal, conjuntos)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Bytes direto para a resposta, sem passar por str
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.options),
+            mimetype='application/json'
+        )
+
+
+def init_json_provider(app):
+    """Escolher o codificador JSON da aplicação (JSON_PROVIDER ou RECEITAS_JSON_PROVIDER)"""
+    name = app.config.get('JSON_PROVIDER') or os.environ.get('RECEITAS_JSON_PROVIDER', 'auto')
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f'Provedor JSON desconhecido: {name}')
+
+    if name == 'orjson' and orjson is None:
+        print('orjson não disponível; usando o codificador JSON padrão')
+    use_orjson = orjson is not None and name != 'padrao'
+
+    app.json = OrjsonProvider(app) if use_orjson else StdlibJSONProvider(app)
+    app.config['JSON_PROVIDER'] = 'orjson' if use_orjson else 'padrao'
+    return app.json
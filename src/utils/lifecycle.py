@@ -0,0 +1,97 @@
+import threading
+from werkzeug.wsgi import ClosingIterator
+
+# Rotinas executadas no encerramento, depois que as requisições terminam
+_shutdown_hooks = []
+
+# Função que encerra o servidor em uso (definida por src/server.py)
+_shutdown_handler = None
+
+
+class RequestTracker:
+    """Middleware WSGI que conta as requisições em andamento
+
+    Durante o encerramento (drain), novas requisições recebem 503 e drain()
+    espera as que já começaram terminarem, inclusive respostas transmitidas
+    aos poucos (PDF, CSV).
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.active = 0
+        self.draining = False
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            if self.draining:
+                start_response('503 Service Unavailable', [
+                    ('Content-Type', 'application/json'),
+                    ('Retry-After', '5'),
+                ])
+                return [b'{"success": false, "error": "Servidor sendo encerrado"}']
+            self.active += 1
+
+        try:
+            response = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self.finished()
+            raise
+        return ClosingIterator(response, self.finished)
+
+    def finished(self):
+        """Marcar uma requisição como concluída"""
+        with self.lock:
+            self.active -= 1
+            if self.active <= 0:
+                self.idle.notify_all()
+
+    def drain(self, timeout=None):
+        """Recusar novas requisições e esperar as em andamento (True se todas terminaram)"""
+        with self.lock:
+            self.draining = True
+            return self.idle.wait_for(lambda: self.active <= 0, timeout)
+
+
+def track_requests(app):
+    """Instalar o RequestTracker na aplicação Flask e retorná-lo"""
+    tracker = app.extensions.get('request_tracker')
+    if tracker is None:
+        tracker = RequestTracker(app.wsgi_app)
+        app.wsgi_app = tracker
+        app.extensions['request_tracker'] = tracker
+    return tracker
+
+
+def register_shutdown_hook(hook):
+    """Registrar rotina de limpeza (ex.: encerrar pool de PDFs) para o encerramento"""
+    _shutdown_hooks.append(hook)
+    return hook
+
+
+def run_shutdown_hooks():
+    """Executar as rotinas de encerramento, na ordem inversa do registro"""
+    for hook in reversed(_shutdown_hooks):
+        try:
+            hook()
+        except Exception as e:
+            print(f"Erro ao encerrar ({getattr(hook, '__name__', hook)}): {e}")
+
+
+def set_shutdown_handler(handler):
+    """Definir a função que encerra o servidor de produção"""
+    global _shutdown_handler
+    _shutdown_handler = handler
+
+
+def request_shutdown():
+    """Pedir o encerramento controlado do servidor
+
+    Retorna False quando não há servidor de produção (ex.: servidor de
+    desenvolvimento do Flask), para o chamador usar outro método.
+    """
+    if _shutdown_handler is None:
+        return False
+    threading.Thread(target=_shutdown_handler, daemon=True).start()
+    return True
@@ -0,0 +1,133 @@
+import bisect
+import threading
+import unicodedata
+from flask import current_app
+from sqlalchemy import select
+from src.models.receitas_models import db, Medicamento, VersaoTabela
+
+# Limite padrão e máximo de sugestões
+DEFAULT_SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 50
+
+
+def fold(text):
+    """Texto sem acentos e em minúsculas, para comparar prefixos"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+class CatalogSnapshot:
+    """Cópia imutável dos medicamentos, montada de uma vez e trocada por inteiro
+
+    by_id: id -> dicionário do medicamento (mesmo formato de to_dict)
+    ordered: dicionários ordenados por denominação genérica (como a listagem)
+    prefix_index: lista ordenada de (texto sem acento, posição em ordered), com
+    uma entrada para cada palavra da denominação, para busca por prefixo com bisect
+    """
+
+    def __init__(self, medicamentos, version=0):
+        self.version = version
+        self.ordered = [medicamento.to_dict() for medicamento in medicamentos]
+        self.by_id = {item['id']: item for item in self.ordered}
+
+        index = []
+        for position, item in enumerate(self.ordered):
+            folded = fold(item['denominacao_generica'])
+            words = folded.split()
+            for start in range(len(words)):
+                index.append((' '.join(words[start:]), position))
+        index.sort()
+        self.prefix_index = index
+
+    def suggest(self, term, limit=DEFAULT_SUGGEST_LIMIT):
+        """Medicamentos cuja denominação (ou uma de suas palavras) começa com term
+
+        Os que começam pelo termo vêm antes; depois, ordem alfabética.
+        """
+        prefix = ' '.join(fold(term).split())
+        if not prefix:
+            return []
+
+        matches = set()
+        position = bisect.bisect_left(self.prefix_index, (prefix,))
+        while position < len(self.prefix_index):
+            key, item_position = self.prefix_index[position]
+            if not key.startswith(prefix):
+                break
+            matches.add(item_position)
+            position += 1
+
+        ranked = sorted(
+            matches,
+            key=lambda item_position: (
+                not fold(self.ordered[item_position]['denominacao_generica']).startswith(prefix),
+                item_position
+            )
+        )
+        return [self.ordered[item_position] for item_position in ranked[:limit]]
+
+
+class MedicamentoCatalog:
+    """Catálogo de medicamentos em memória, carregado sob demanda
+
+    A cópia vale enquanto a versão de medicamentos em versoes_tabelas não
+    mudar: cada get() confere a versão com uma consulta pela chave primária,
+    então gravações feitas por outros processos do servidor também descartam
+    a cópia. As rotas que gravam medicamentos ainda chamam invalidate() depois
+    do commit.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        """Cópia atual do catálogo (recarrega se a versão da tabela mudou ou se foi invalidada)"""
+        version = current_version()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self.lock:
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            # Versão lida antes das linhas: a cópia nunca fica mais antiga que a versão anotada
+            self.snapshot = CatalogSnapshot(
+                Medicamento.query.order_by(Medicamento.denominacao_generica, Medicamento.id).all(),
+                version
+            )
+            return self.snapshot
+
+    def invalidate(self):
+        """Descartar o catálogo (chamar depois de gravar medicamentos)"""
+        with self.lock:
+            self.snapshot = None
+
+
+def current_version():
+    """Versão atual da tabela medicamentos (0 se nunca alterada)"""
+    return db.session.execute(
+        select(VersaoTabela.versao).where(VersaoTabela.nome == Medicamento.__tablename__)
+    ).scalar() or 0
+
+
+def init_medicamento_catalog(app):
+    """Criar o catálogo da aplicação"""
+    catalog = MedicamentoCatalog()
+    app.extensions['medicamento_catalog'] = catalog
+    return catalog
+
+
+def get_medicamento_catalog():
+    """Catálogo da aplicação atual (criado na primeira chamada, se necessário)"""
+    catalog = current_app.extensions.get('medicamento_catalog')
+    if catalog is None:
+        catalog = init_medicamento_catalog(current_app)
+    return catalog
+
+
+def invalidate_medicamento_catalog():
+    """Descartar o catálogo da aplicação atual"""
+    get_medicamento_catalog().invalidate()
@@ -0,0 +1,244 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+
+# Limites dos histogramas (segundos e bytes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+PDF_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+IMPORT_DURATION_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Rótulo das requisições que não correspondem a nenhuma rota
+UNMATCHED_ENDPOINT = 'nao_encontrada'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Métrica com rótulos (counter ou gauge); os valores ficam por tupla de rótulos"""
+
+    kind = 'counter'
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def inc(self, amount=1, *labels):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, value, *labels):
+        self.values[labels] = value
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield f'{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}'
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+
+class Histogram(Metric):
+    """Histograma com limites fixos (contagens acumuladas só na exportação)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        state = self.values.get(labels)
+        if state is None:
+            # Contagem por faixa (a última é +Inf), soma e total
+            state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self):
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labels, labels, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{le} {cumulative}'
+            suffix = _format_labels(self.labels, labels)
+            yield f'{self.name}_sum{suffix} {_format_value(total)}'
+            yield f'{self.name}_count{suffix} {count}'
+
+
+class MetricsRegistry:
+    """Métricas do processo, exportadas no formato texto do Prometheus
+
+    Tudo fica em memória e é protegido por um único lock (as atualizações são
+    poucas operações de dicionário). Com vários processos (gunicorn), cada um
+    tem suas próprias métricas.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = []
+        self.collectors = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, description, labels=()):
+        return self.add(Metric(name, description, labels))
+
+    def gauge(self, name, description, labels=()):
+        return self.add(Gauge(name, description, labels))
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, description, labels, buckets))
+
+    def add_collector(self, collector):
+        """Registrar função chamada antes de cada exportação (atualiza gauges)"""
+        self.collectors.append(collector)
+        return collector
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f'Erro ao coletar métricas: {e}')
+
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f'# HELP {metric.name} {metric.description}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'receitas_http_requests_total', 'Requisições atendidas', ('method', 'endpoint', 'status'))
+HTTP_DURATION = REGISTRY.histogram(
+    'receitas_http_request_duration_seconds', 'Tempo de resposta por rota', ('method', 'endpoint'), LATENCY_BUCKETS)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    'receitas_http_response_size_bytes', 'Tamanho das respostas (após compressão)', ('endpoint',), SIZE_BUCKETS)
+HTTP_IN_PROGRESS = REGISTRY.gauge(
+    'receitas_http_requests_in_progress', 'Requisições em andamento')
+
+PDF_RENDERS = REGISTRY.counter(
+    'receitas_pdf_renders_total', 'PDFs renderizados', ('origem',))
+PDF_RENDER_FAILURES = REGISTRY.counter(
+    'receitas_pdf_render_failures_total', 'Falhas na renderização de PDFs', ('origem',))
+PDF_RENDER_DURATION = REGISTRY.histogram(
+    'receitas_pdf_render_duration_seconds', 'Tempo de renderização de cada PDF', ('origem',), PDF_DURATION_BUCKETS)
+PDF_PAGES = REGISTRY.counter(
+    'receitas_pdf_pages_total', 'Páginas renderizadas (uma por mês da receita)', ('origem',))
+PDF_BYTES = REGISTRY.counter(
+    'receitas_pdf_bytes_total', 'Bytes de PDF gerados', ('origem',))
+
+IMPORT_ROWS = REGISTRY.counter(
+    'receitas_import_rows_total', 'Linhas de CSV importadas por resultado', ('tipo', 'resultado'))
+IMPORT_DURATION = REGISTRY.histogram(
+    'receitas_import_duration_seconds', 'Duração das importações de CSV', ('tipo',), IMPORT_DURATION_BUCKETS)
+
+
+def observe_pdf_render(origem, seconds, pages, size):
+    """Registrar um PDF renderizado (origem: requisicao, tarefa ou lote)"""
+    with REGISTRY.lock:
+        PDF_RENDERS.inc(1, origem)
+        PDF_RENDER_DURATION.observe(seconds, origem)
+        PDF_PAGES.inc(pages, origem)
+        PDF_BYTES.inc(size, origem)
+
+
+def observe_pdf_failure(origem):
+    """Registrar uma falha de renderização"""
+    with REGISTRY.lock:
+        PDF_RENDER_FAILURES.inc(1, origem)
+
+
+# Campos do resumo da importação e o rótulo correspondente
+IMPORT_RESULTS = (('imported', 'importada'), ('duplicated', 'duplicada'), ('error_count', 'erro'))
+
+
+def observe_import(tipo, result, seconds):
+    """Registrar uma importação de CSV a partir do resumo do importador
+
+    A vazão (linhas por segundo) sai de rate(receitas_import_rows_total) ou da
+    razão entre as linhas e receitas_import_duration_seconds_sum.
+    """
+    with REGISTRY.lock:
+        IMPORT_DURATION.observe(seconds, tipo)
+        for key, resultado in IMPORT_RESULTS:
+            if key in result:
+                IMPORT_ROWS.inc(result[key], tipo, resultado)
+
+
+def _endpoint_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ENDPOINT
+
+
+def init_metrics(app):
+    """Medir as requisições da aplicação (rota, status, tempo e tamanho)
+
+    Deve ser chamado antes de init_compression: os after_request rodam na ordem
+    inversa do registro, então o tamanho medido é o do corpo já comprimido.
+    Em respostas transmitidas aos poucos (CSV, arquivos) o tempo vai até o
+    início do envio e o tamanho só é contado quando conhecido.
+    """
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        with REGISTRY.lock:
+            HTTP_IN_PROGRESS.inc(1)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = _endpoint_label()
+        size = response.content_length
+        with REGISTRY.lock:
+            HTTP_IN_PROGRESS.inc(-1)
+            HTTP_REQUESTS.inc(1, request.method, endpoint, str(response.status_code))
+            HTTP_DURATION.observe(elapsed, request.method, endpoint)
+            if size is not None:
+                HTTP_RESPONSE_SIZE.observe(size, endpoint)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        # after_request não rodou (erro fora do tratamento do Flask)
+        if g.pop('metrics_started', None) is not None:
+            with REGISTRY.lock:
+                HTTP_IN_PROGRESS.inc(-1)
+
+    app.extensions['metrics'] = REGISTRY
+    return REGISTRY
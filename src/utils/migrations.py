@@ -0,0 +1,170 @@
+from datetime import datetime
+from src.models.receitas_models import db
+
+# Tabela com as migrações já aplicadas no banco
+MIGRATIONS_TABLE = 'schema_migrations'
+
+# Esquema original (o mesmo que db.create_all() gerava), usado por bancos novos
+SCHEMA_INICIAL = [
+    """CREATE TABLE IF NOT EXISTS pacientes (
+        id INTEGER NOT NULL,
+        nome_completo VARCHAR(200) NOT NULL,
+        cpf VARCHAR(14),
+        data_nascimento DATE,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (cpf)
+    )""",
+    """CREATE TABLE IF NOT EXISTS medicamentos (
+        id INTEGER NOT NULL,
+        denominacao_generica VARCHAR(200) NOT NULL,
+        concentracao VARCHAR(100),
+        apresentacao VARCHAR(100),
+        created_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS receitas (
+        id INTEGER NOT NULL,
+        paciente_id INTEGER NOT NULL,
+        data_inicial DATE NOT NULL,
+        num_receitas INTEGER NOT NULL,
+        observacoes TEXT,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(paciente_id) REFERENCES pacientes (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS receita_medicamentos (
+        id INTEGER NOT NULL,
+        receita_id INTEGER NOT NULL,
+        medicamento_id INTEGER NOT NULL,
+        posologia VARCHAR(200),
+        instrucoes TEXT,
+        PRIMARY KEY (id),
+        FOREIGN KEY(receita_id) REFERENCES receitas (id),
+        FOREIGN KEY(medicamento_id) REFERENCES medicamentos (id)
+    )""",
+]
+
+VERSOES_TABELAS = [
+    """CREATE TABLE IF NOT EXISTS versoes_tabelas (
+        nome VARCHAR(50) NOT NULL,
+        versao INTEGER NOT NULL,
+        PRIMARY KEY (nome)
+    )""",
+]
+
+# Índices das listagens, ordenações e junções (mesmos nomes de __table_args__ nos modelos)
+INDICES_LISTAGENS = [
+    # Receitas por paciente, em ordem de criação (filtro paciente_id + cursor)
+    "CREATE INDEX IF NOT EXISTS ix_receitas_paciente_id_created_at ON receitas (paciente_id, created_at)",
+    # Listagem de receitas por (created_at, id)
+    "CREATE INDEX IF NOT EXISTS ix_receitas_created_at ON receitas (created_at)",
+    # Filtros data_de / data_ate
+    "CREATE INDEX IF NOT EXISTS ix_receitas_data_inicial ON receitas (data_inicial)",
+    # Itens de cada receita (selectinload e gatilhos do índice de busca)
+    "CREATE INDEX IF NOT EXISTS ix_receita_medicamentos_receita_id ON receita_medicamentos (receita_id)",
+    # Filtro medicamento_id: devolve receita_id sem ler a tabela
+    "CREATE INDEX IF NOT EXISTS ix_receita_medicamentos_medicamento_id ON receita_medicamentos (medicamento_id, receita_id)",
+    # Listagens ordenadas por nome (o id entra no índice como rowid)
+    "CREATE INDEX IF NOT EXISTS ix_pacientes_nome_completo ON pacientes (nome_completo)",
+    "CREATE INDEX IF NOT EXISTS ix_medicamentos_denominacao_generica ON medicamentos (denominacao_generica)",
+    # Estatísticas para o planejador de consultas escolher os índices
+    "ANALYZE",
+]
+
+ENVIOS_IMPORTACAO = [
+    """CREATE TABLE IF NOT EXISTS envios_importacao (
+        id VARCHAR(32) NOT NULL,
+        estado TEXT NOT NULL,
+        resto BLOB,
+        updated_at DATETIME NOT NULL,
+        PRIMARY KEY (id)
+    )""",
+    # Limpeza dos envios expirados
+    "CREATE INDEX IF NOT EXISTS ix_envios_importacao_updated_at ON envios_importacao (updated_at)",
+]
+
+# Migrações em ordem: (versão, descrição, comandos SQL)
+# Nunca alterar uma migração já publicada; mudanças novas entram no fim da lista.
+# O SQLite só altera tabelas de forma limitada (ADD COLUMN, RENAME): para o
+# resto, criar a tabela nova, copiar os dados e trocar os nomes.
+MIGRATIONS = [
+    (1, 'Esquema inicial', SCHEMA_INICIAL),
+    (2, 'Versões das tabelas (ETag das listagens)', VERSOES_TABELAS),
+    (3, 'Índices das listagens, ordenações e junções', INDICES_LISTAGENS),
+    (4, 'Progresso dos envios de CSV em partes', ENVIOS_IMPORTACAO),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_migrations_table(conn):
+    conn.exec_driver_sql(
+        f"""CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INTEGER NOT NULL PRIMARY KEY,
+            description VARCHAR(200) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )"""
+    )
+
+
+def applied_versions(conn):
+    """Versões já aplicadas no banco"""
+    _ensure_migrations_table(conn)
+    return {row[0] for row in conn.exec_driver_sql(f'SELECT version FROM {MIGRATIONS_TABLE}')}
+
+
+def current_version():
+    """Maior versão aplicada (0 para banco sem migrações)"""
+    with db.engine.connect() as conn:
+        versions = applied_versions(conn)
+        conn.commit()
+    return max(versions, default=0)
+
+
+def pending_migrations():
+    """Migrações ainda não aplicadas, em ordem"""
+    with db.engine.connect() as conn:
+        applied = applied_versions(conn)
+        conn.commit()
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+def run_migrations(target=None, verbose=True):
+    """Aplicar as migrações pendentes (até target), cada uma em sua transação
+
+    Deve ser chamado dentro do app_context. BEGIN IMMEDIATE bloqueia outros
+    processos que estejam migrando ao mesmo tempo; a versão é conferida de novo
+    dentro da transação. Retorna a lista de versões aplicadas.
+    """
+    # Banco já atualizado (caso comum ao iniciar): só uma leitura, sem lock de escrita
+    pending = pending_migrations()
+    applied_now = []
+    for version, description, statements in pending:
+        if target is not None and version > target:
+            break
+
+        with db.engine.connect() as conn:
+            # DDL no SQLite é transacional, mas o driver só abre transação
+            # sozinho antes de INSERT/UPDATE/DELETE: abrir explicitamente
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+            try:
+                if version in applied_versions(conn):
+                    conn.rollback()
+                    continue
+
+                for statement in statements:
+                    conn.exec_driver_sql(statement)
+                conn.exec_driver_sql(
+                    f'INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) VALUES (?, ?, ?)',
+                    (version, description, datetime.utcnow().isoformat(' '))
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        applied_now.append(version)
+        if verbose:
+            print(f'Migração {version} aplicada: {description}')
+    return applied_now
@@ -0,0 +1,91 @@
+import base64
+import json
+from sqlalchemy import tuple_
+
+# Limites da paginação por cursor
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def is_paginated_request(args):
+    """Verificar se a requisição pede o modo paginado (limit, after ou fields)"""
+    return any(args.get(param) for param in ('limit', 'after', 'fields'))
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT, name='limit'):
+    """Converter o parâmetro limit (ou outra quantidade, indicada em name), respeitando o máximo permitido"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Parâmetro {name} inválido: {value}')
+    if limit < 1:
+        raise ValueError(f'Parâmetro {name} deve ser maior que zero')
+    return min(limit, maximum)
+
+
+def parse_fields(value, model, allowed):
+    """Converter o parâmetro fields em uma lista de colunas do modelo
+
+    O campo 'id' é sempre incluído, pois faz parte do cursor.
+    """
+    if not value:
+        names = list(allowed)
+    else:
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        invalid = [name for name in names if name not in allowed]
+        if invalid:
+            raise ValueError(f'Campos inválidos: {", ".join(invalid)}')
+        if 'id' not in names:
+            names.insert(0, 'id')
+    return names, [getattr(model, name) for name in names]
+
+
+def encode_cursor(values):
+    """Codificar os valores da última linha da página em um cursor opaco"""
+    raw = json.dumps(values, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decodificar um cursor gerado por encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError('Cursor inválido')
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Cursor inválido')
+    return values
+
+
+def keyset_page(query, sort_column, id_column, columns, names, limit, after=None):
+    """Buscar uma página ordenada por (sort_column, id) a partir do cursor
+
+    Apenas as colunas pedidas são carregadas; retorna (linhas, próximo cursor).
+    """
+    sort_name = sort_column.key
+    # A coluna de ordenação precisa vir na consulta para montar o próximo cursor
+    load_columns = list(columns)
+    if sort_name not in names:
+        load_columns.append(sort_column)
+
+    query = query.with_entities(*load_columns)
+    if after:
+        sort_value, last_id = decode_cursor(after)
+        query = query.filter(tuple_(sort_column, id_column) > tuple_(sort_value, last_id))
+
+    rows = query.order_by(sort_column, id_column).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Datas são convertidas pelo codificador JSON da aplicação, como em to_dict()
+    data = [dict(zip(names, row)) for row in rows]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor([last[sort_name], last['id']])
+
+    return data, next_cursor
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from flask import current_app
+
+# Tamanho máximo padrão do cache em disco
+DEFAULT_PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+
+def pdf_cache_key(pdf_data):
+    """Hash canônico dos dados de renderização (inclui a versão do layout)
+
+    pdf_data tem paciente_info, medicamentos_info, num_receitas, data_inicial
+    e observacoes; o mesmo conteúdo sempre gera a mesma chave.
+    """
+    from src.utils.pdf_generator import PDF_TEMPLATE_VERSION
+
+    canonical = json.dumps(
+        {'template': PDF_TEMPLATE_VERSION, 'data': pdf_data},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':'),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class PDFCache:
+    """Cache de PDFs em disco, endereçado pelo conteúdo, com limite de tamanho
+
+    Cada PDF fica em <diretório>/<chave>.pdf. Ao passar do limite, os arquivos
+    usados há mais tempo (data de modificação, atualizada a cada acerto) são
+    removidos primeiro.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_PDF_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def path_for(self, key):
+        """Caminho do arquivo de uma chave"""
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, key):
+        """PDF em cache já aberto para leitura (o chamador fecha) ou None
+
+        O arquivo é aberto aqui e não só localizado: se outra requisição o
+        remover do cache logo depois (_evict), o arquivo aberto continua
+        legível até ser fechado.
+        """
+        path = self.path_for(key)
+        try:
+            pdf_file = open(path, 'rb')
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # Marcar como usado recentemente
+        except OSError:
+            pass  # Removido nesse meio tempo; o arquivo aberto continua válido
+        return pdf_file
+
+    def put(self, key, pdf_bytes):
+        """Gravar o PDF no cache e retornar o caminho"""
+        path = self.path_for(key)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(pdf_bytes)
+
+        with self.lock:
+            existed = os.path.exists(path)
+            os.replace(temp_path, path)
+            if not existed:
+                self.total_bytes += len(pdf_bytes)
+            if self.total_bytes > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def clear(self):
+        """Remover todos os PDFs do cache"""
+        with self.lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pdf'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self, keep=None):
+        """Remover os PDFs menos usados até voltar ao limite"""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self.total_bytes = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Arquivo em uso (Windows); tentar na próxima vez
+            self.total_bytes -= size
+
+
+def init_pdf_cache(app):
+    """Criar o cache de PDFs conforme PDF_CACHE_DIR e PDF_CACHE_MAX_BYTES"""
+    directory = app.config.get('PDF_CACHE_DIR')
+    if not directory:
+        return None
+    cache = PDFCache(directory, app.config.get('PDF_CACHE_MAX_BYTES', DEFAULT_PDF_CACHE_MAX_BYTES))
+    app.extensions['pdf_cache'] = cache
+    return cache
+
+
+def get_pdf_cache():
+    """Cache de PDFs da aplicação atual (None se desativado)"""
+    return current_app.extensions.get('pdf_cache')
@@ -1,14 +1,71 @@
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm, cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak, Flowable, Frame
+from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from datetime import datetime, timedelta
+from reportlab.lib.utils import ImageReader
+from datetime import datetime, timedelta, date
+import copy
+import io
 import os
 import tempfile
+import threading
+
+# Versão do layout da receita; alterar sempre que o PDF gerado mudar (invalida o cache)
+PDF_TEMPLATE_VERSION = '2'
+
+class CachedImage(Flowable):
+    """Imagem já decodificada, compartilhada entre documentos"""
+
+    def __init__(self, reader, width, height):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask='auto')
+
+class DateSlot(Flowable):
+    """Espaço da data no cabeçalho, para desenhar a data depois em cada página
+
+    Ocupa o mesmo espaço do parágrafo de exemplo e, ao ser desenhado, só
+    anota a posição na página e a largura disponível.
+    """
+
+    def __init__(self, paragraph):
+        super().__init__()
+        self.paragraph = paragraph
+        self.avail_width = 0
+        self.avail_height = 0
+        self.position = None
+
+    def wrap(self, availWidth, availHeight):
+        self.avail_width, self.avail_height = availWidth, availHeight
+        self.width, self.height = self.paragraph.wrap(availWidth, availHeight)
+        return self.width, self.height
+
+    def draw(self):
+        self.position = self.canv.absolutePosition(0, 0)
+
+    def stamp(self, canvas, paragraph):
+        """Desenhar o parágrafo da data na posição anotada"""
+        paragraph.wrapOn(canvas, self.avail_width, self.avail_height)
+        paragraph.drawOn(canvas, *self.position)
 
 class PDFGenerator:
+    """Gerador de receitas em PDF
+
+    Estilos, logo decodificado e elementos fixos (cabeçalho e rodapé) são
+    montados uma única vez no construtor. Cada documento usa cópias desses
+    elementos, então a mesma instância pode ser usada por várias threads.
+    """
+
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self.setup_custom_styles()
@@ -17,6 +74,74 @@ class PDFGenerator:
                                       os.pardir, 
                                       'static', 
                                       'perobal_logo.png') # Nome do arquivo do logo
+        self.logo_reader = self.load_logo()
+        self.setup_static_elements()
+
+    def load_logo(self):
+        """Ler e decodificar o logo uma única vez"""
+        try:
+            reader = ImageReader(self.logo_path)
+            reader.getRGBData()  # Decodificar agora; o resultado fica em cache no reader
+            return reader
+        except Exception as e:
+            print(f"Erro ao carregar logo: {e}")
+            return None
+
+    def setup_static_elements(self):
+        """Montar os elementos que não mudam entre receitas"""
+        self.empty_paragraph = Paragraph("", self.normal_style)
+        self.logo_placeholder = Paragraph("LOGO AQUI", self.header_title_style)
+
+        # Informações da prefeitura
+        self.prefeitura_info = [
+            Paragraph("PREFEITURA MUNICIPAL DE PEROBAL", self.header_title_style),
+            Paragraph("Secretaria Municipal de Saúde", self.header_subtitle_style),
+            Paragraph("Cidade de todos", self.address_style) # Adicionado do modelo
+        ]
+        self.recipe_title = Paragraph("RECEITA MÉDICA", self.recipe_title_style)
+
+        self.header_table_style = TableStyle([
+            ('ALIGN', (0,0), (0,-1), 'LEFT'),
+            ('ALIGN', (1,0), (1,-1), 'CENTER'),
+            ('ALIGN', (2,0), (2,0), 'RIGHT'),
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('LEFTPADDING', (0,0), (-1,-1), 0),
+            ('RIGHTPADDING', (0,0), (-1,-1), 0),
+            ('TOPPADDING', (0,0), (-1,-1), 0),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+        ])
+        self.patient_table_style = TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('LEFTPADDING', (0,0), (-1,-1), 0),
+            ('RIGHTPADDING', (0,0), (-1,-1), 0),
+            ('TOPPADDING', (0,0), (-1,-1), 0),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+        ])
+
+        self.medications_label = Paragraph("<b>Medicamentos:</b>", self.patient_info_label_style)
+        self.observations_label = Paragraph("<b>Observações:</b>", self.patient_info_label_style)
+
+        # Rodapé com espaço para assinatura e endereço
+        address_footer = "Rua Jaracatiá, 1060 - Telefax (044)3625-1225 - CEP. 87538-000 - PEROBAL - PARANÁ"
+        self.signature_footer = [
+            Spacer(1, 40*mm), # Espaço para assinatura
+            Paragraph("______________________________________", self.normal_style),
+            Paragraph("Assinatura do Médico", self.normal_style),
+            Spacer(1, 5*mm),
+            Paragraph("CRM:", self.normal_style),
+            Spacer(1, 20*mm),
+            Paragraph(address_footer, self.footer_style),
+        ]
+
+    def clone(self, flowable):
+        """Cópia rasa de um elemento pré-montado (o texto já vem processado)"""
+        return copy.copy(flowable)
+
+    def create_logo(self):
+        """Criar o elemento do logo a partir da imagem em cache"""
+        if self.logo_reader is None:
+            return self.clone(self.logo_placeholder)
+        return CachedImage(self.logo_reader, 50*mm, 15*mm) # Ajustar tamanho conforme necessário
 
     def setup_custom_styles(self):
         """Configurar estilos customizados"""
@@ -112,50 +237,36 @@ class PDFGenerator:
             spaceBefore=20
         )
 
-    def create_header(self, data_receita):
+    def create_date(self, data_receita):
+        """Data da receita, mostrada no canto superior direito"""
+        data_formatada = data_receita.strftime("%d/%m/%Y")
+        return Paragraph(f"Perobal, {data_formatada}", self.normal_style)
+
+    def create_header(self, data_receita, perobal_date=None):
         """Criar cabeçalho oficial da receita com logo e informações"""
         elements = []
 
         # Logo
-        try:
-            logo = Image(self.logo_path, width=50*mm, height=15*mm) # Ajustar tamanho conforme necessário
-        except Exception as e:
-            print(f"Erro ao carregar logo: {e}")
-            logo = Paragraph("LOGO AQUI", self.header_title_style)
+        logo = self.create_logo()
 
-        # Informações da prefeitura
-        prefeitura_info = [
-            Paragraph("PREFEITURA MUNICIPAL DE PEROBAL", self.header_title_style),
-            Paragraph("Secretaria Municipal de Saúde", self.header_subtitle_style),
-            Paragraph("Cidade de todos", self.address_style) # Adicionado do modelo
-        ]
-
-        # Data da receita no canto superior direito
-        data_formatada = data_receita.strftime("%d/%m/%Y")
-        perobal_date = Paragraph(f"Perobal, {data_formatada}", self.normal_style)
+        # Data da receita no canto superior direito (ou o espaço dela, ver DateSlot)
+        if perobal_date is None:
+            perobal_date = self.create_date(data_receita)
 
         # Tabela para organizar logo, informações e data
+        empty = self.empty_paragraph
         header_table_data = [
-            [logo, Paragraph("", self.normal_style), perobal_date], # Espaço em branco para alinhar
-            [Paragraph("", self.normal_style), prefeitura_info[0], Paragraph("", self.normal_style)],
-            [Paragraph("", self.normal_style), prefeitura_info[1], Paragraph("", self.normal_style)],
-            [Paragraph("", self.normal_style), prefeitura_info[2], Paragraph("", self.normal_style)]
+            [logo, self.clone(empty), perobal_date], # Espaço em branco para alinhar
+            [self.clone(empty), self.clone(self.prefeitura_info[0]), self.clone(empty)],
+            [self.clone(empty), self.clone(self.prefeitura_info[1]), self.clone(empty)],
+            [self.clone(empty), self.clone(self.prefeitura_info[2]), self.clone(empty)]
         ]
 
         header_table = Table(header_table_data, colWidths=[55*mm, 90*mm, 50*mm])
-        header_table.setStyle(TableStyle([
-            ('ALIGN', (0,0), (0,-1), 'LEFT'),
-            ('ALIGN', (1,0), (1,-1), 'CENTER'),
-            ('ALIGN', (2,0), (2,0), 'RIGHT'),
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('LEFTPADDING', (0,0), (-1,-1), 0),
-            ('RIGHTPADDING', (0,0), (-1,-1), 0),
-            ('TOPPADDING', (0,0), (-1,-1), 0),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-        ]))
+        header_table.setStyle(self.header_table_style)
         elements.append(header_table)
         elements.append(Spacer(1, 5*mm))
-        elements.append(Paragraph("RECEITA MÉDICA", self.recipe_title_style))
+        elements.append(self.clone(self.recipe_title))
         elements.append(Spacer(1, 5*mm))
 
         return elements
@@ -178,17 +289,11 @@ class PDFGenerator:
             [Paragraph(f"<b>Paciente:</b> {paciente_info['nome']}", self.patient_info_label_style), 
              Paragraph(f"<b>Data de Nascimento:</b> {data_nasc_formatada}", self.patient_info_label_style)],
             [Paragraph(f"<b>CPF/RG:</b> {paciente_info.get('cpf_rg', '')}", self.patient_info_label_style), 
-             Paragraph("", self.patient_info_label_style)] # Coluna vazia para alinhamento
+             self.clone(self.empty_paragraph)] # Coluna vazia para alinhamento
         ]
 
         patient_table = Table(data, colWidths=[100*mm, 80*mm])
-        patient_table.setStyle(TableStyle([
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('LEFTPADDING', (0,0), (-1,-1), 0),
-            ('RIGHTPADDING', (0,0), (-1,-1), 0),
-            ('TOPPADDING', (0,0), (-1,-1), 0),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-        ]))
+        patient_table.setStyle(self.patient_table_style)
         patient_elements.append(patient_table)
         patient_elements.append(Spacer(1, 10*mm))
 
@@ -198,7 +303,7 @@ class PDFGenerator:
         """Criar seção de medicamentos"""
         med_elements = []
 
-        med_elements.append(Paragraph("<b>Medicamentos:</b>", self.patient_info_label_style))
+        med_elements.append(self.clone(self.medications_label))
         med_elements.append(Spacer(1, 2*mm))
 
         for i, med in enumerate(medicamentos_info, 1):
@@ -229,44 +334,45 @@ class PDFGenerator:
         
         if observacoes and observacoes.strip():
             obs_elements.append(Spacer(1, 10*mm))
-            obs_elements.append(Paragraph("<b>Observações:</b>", self.patient_info_label_style))
+            obs_elements.append(self.clone(self.observations_label))
             obs_elements.append(Paragraph(observacoes, self.observations_style))
         
         return obs_elements
 
     def create_signature_footer(self):
         """Criar rodapé com espaço para assinatura e informações de contato"""
-        footer_elements = []
-        
-        footer_elements.append(Spacer(1, 40*mm)) # Espaço para assinatura
-        footer_elements.append(Paragraph("______________________________________", self.normal_style))
-        footer_elements.append(Paragraph("Assinatura do Médico", self.normal_style))
-        footer_elements.append(Spacer(1, 5*mm))
-        footer_elements.append(Paragraph("CRM:", self.normal_style))
-        footer_elements.append(Spacer(1, 20*mm))
-
-        # Rodapé com endereço
-        address_footer = "Rua Jaracatiá, 1060 - Telefax (044)3625-1225 - CEP. 87538-000 - PEROBAL - PARANÁ"
-        footer_elements.append(Paragraph(address_footer, self.footer_style))
-        
-        return footer_elements
+        return [self.clone(element) for element in self.signature_footer]
+
+    def create_document(self, output=None):
+        """Criar o documento PDF no destino pedido
+
+        output pode ser None (arquivo temporário, retorna o caminho), um caminho
+        de arquivo (retorna o caminho) ou um objeto com write(), como o buffer
+        de create_pdf_buffer() (retorna o próprio objeto).
+
+        O documento é gerado em modo invariante (sem data de criação nem ID
+        aleatório), para que os mesmos dados sempre produzam os mesmos bytes.
+        """
+        if output is None:
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+            output = temp_file.name
+            temp_file.close()
 
-    def generate_receita_pdf(self, paciente_info, medicamentos_info, data_receita, observacoes=""):
-        """Gerar uma única receita em PDF"""
-        # Criar arquivo temporário
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        temp_filename = temp_file.name
-        temp_file.close()
-        
-        # Criar documento PDF
         doc = SimpleDocTemplate(
-            temp_filename,
+            output,
             pagesize=A4,
             rightMargin=2*cm,
             leftMargin=2*cm,
             topMargin=2*cm,
-            bottomMargin=2*cm
+            bottomMargin=2*cm,
+            invariant=1
         )
+        return doc, output
+
+    def generate_receita_pdf(self, paciente_info, medicamentos_info, data_receita, observacoes="", output=None):
+        """Gerar uma única receita em PDF"""
+        # Criar documento PDF (arquivo temporário, caminho ou buffer)
+        doc, result = self.create_document(output)
         
         # Construir conteúdo
         story = []
@@ -289,24 +395,20 @@ class PDFGenerator:
         # Gerar PDF
         doc.build(story)
         
-        return temp_filename
+        return result
     
-    def generate_receitas_multiplas(self, paciente_info, medicamentos_info, num_receitas, data_inicial, observacoes=""):
-        """Gerar múltiplas receitas em um único PDF"""
-        # Criar arquivo temporário
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        temp_filename = temp_file.name
-        temp_file.close()
-        
-        # Criar documento PDF
-        doc = SimpleDocTemplate(
-            temp_filename,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
+    def generate_receitas_multiplas(self, paciente_info, medicamentos_info, num_receitas, data_inicial, observacoes="", output=None):
+        """Gerar múltiplas receitas em um único PDF
+
+        Só a data muda de um mês para o outro: o corpo da receita é diagramado
+        uma vez e reaproveitado em todas as páginas (render_template_pages).
+        Quando o corpo não cabe em uma página, cada mês é montado por inteiro.
+        """
+        # Criar documento PDF (arquivo temporário, caminho ou buffer)
+        doc, result = self.create_document(output)
+
+        if self.render_template_pages(doc, paciente_info, medicamentos_info, num_receitas, data_inicial, observacoes):
+            return result
         
         story = []
         
@@ -337,7 +439,51 @@ class PDFGenerator:
         # Gerar PDF
         doc.build(story)
         
-        return temp_filename
+        return result
+    
+    def render_template_pages(self, doc, paciente_info, medicamentos_info, num_receitas, data_inicial, observacoes=""):
+        """Gravar as receitas reutilizando um único corpo de página (Form XObject)
+
+        O corpo (cabeçalho sem a data, paciente, medicamentos, observações e
+        rodapé) é diagramado uma vez no frame do documento e gravado como
+        formulário; cada página desenha o formulário e escreve só a sua data.
+        Tempo e tamanho do PDF quase não crescem com o número de meses.
+        Retorna False, sem gravar nada, se o corpo não couber em uma página.
+        """
+        slot = DateSlot(self.create_date(data_inicial))
+        story = []
+        story.extend(self.create_header(data_inicial, perobal_date=slot))
+        story.extend(self.create_patient_info(paciente_info, data_inicial))
+        story.extend(self.create_medications_section(medicamentos_info))
+        story.extend(self.create_observations_section(observacoes))
+        story.extend(self.create_signature_footer())
+
+        # Mesmo canvas e frame que doc.build usaria (margens e modo invariante)
+        canvas = Canvas(doc.filename, pagesize=doc.pagesize, invariant=doc.invariant)
+        frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+
+        canvas.beginForm('corpo_receita')
+        frame.addFromList(story, canvas)
+        canvas.endForm()
+        if story or slot.position is None:
+            return False
+
+        for i in range(num_receitas):
+            canvas.doForm('corpo_receita')
+            slot.stamp(canvas, self.create_date(data_inicial + timedelta(days=30 * i)))
+            canvas.showPage()
+        canvas.save()
+        return True
+
+    def generate_pdf(self, paciente_info, medicamentos_info, num_receitas, data_inicial, observacoes="", output=None):
+        """Gerar receita única ou múltiplas conforme num_receitas"""
+        if num_receitas == 1:
+            return self.generate_receita_pdf(
+                paciente_info, medicamentos_info, data_inicial, observacoes, output=output
+            )
+        return self.generate_receitas_multiplas(
+            paciente_info, medicamentos_info, num_receitas, data_inicial, observacoes, output=output
+        )
     
     def get_filename_for_patient(self, paciente_nome, data_inicial, num_receitas):
         """Gerar nome do arquivo baseado no paciente e data"""
@@ -357,4 +503,46 @@ class PDFGenerator:
         return filename
 
 
-
+# PDFs até este tamanho ficam só em memória; acima disso vão para um arquivo temporário
+PDF_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+def create_pdf_buffer(max_size=PDF_SPOOL_MAX_SIZE):
+    """Criar buffer para gerar o PDF em memória
+
+    O arquivo temporário (quando usado) é apagado automaticamente ao fechar o buffer.
+    """
+    return tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+b', suffix=".pdf")
+
+# Instância única do gerador, compartilhada por todas as requisições
+_pdf_generator = None
+_pdf_generator_lock = threading.Lock()
+
+def get_pdf_generator():
+    """Obter o gerador de PDF do processo (criado na primeira chamada)"""
+    global _pdf_generator
+    if _pdf_generator is None:
+        with _pdf_generator_lock:
+            if _pdf_generator is None:
+                _pdf_generator = PDFGenerator()
+    return _pdf_generator
+
+def warm_up_pdf_generator():
+    """Criar o gerador e renderizar uma receita de exemplo em memória
+
+    Carrega fontes, estilos e logo antes da primeira requisição.
+    """
+    generator = get_pdf_generator()
+    doc = SimpleDocTemplate(io.BytesIO(), pagesize=A4)
+    story = []
+    story.extend(generator.create_header(date.today()))
+    story.extend(generator.create_patient_info({'nome': 'Aquecimento'}, date.today()))
+    story.extend(generator.create_medications_section([{'denominacao': 'Aquecimento'}]))
+    story.extend(generator.create_signature_footer())
+    doc.build(story)
+    return generator
+
+def reset_pdf_generator():
+    """Descartar o gerador atual (ex.: após trocar o logo); o próximo uso recria"""
+    global _pdf_generator
+    with _pdf_generator_lock:
+        _pdf_generator = None
@@ -0,0 +1,227 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from src.utils.pdf_cache import pdf_cache_key
+from src.utils.pdf_pool import render_pdf, DEFAULT_PDF_WORKERS
+
+# Tarefas executadas ao mesmo tempo, limite da fila e validade dos PDFs prontos
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_MAX_PENDING_JOBS = 100
+DEFAULT_JOB_TTL = 3600
+
+# Intervalo mínimo entre limpezas dos arquivos expirados
+CLEANUP_INTERVAL = 60
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobQueueFull(Exception):
+    """Fila de tarefas de PDF cheia"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class PDFJobQueue:
+    """Fila de geração de PDFs em segundo plano
+
+    Cada tarefa tem um arquivo <id>.json com o estado e, quando pronta, o
+    <id>.pdf no mesmo diretório. O estado fica em disco para que qualquer
+    processo do servidor possa responder a consulta; só o processo que recebeu
+    a tarefa a executa. Tarefas e PDFs são apagados ttl segundos depois da
+    última atualização.
+    """
+
+    def __init__(self, directory, workers=DEFAULT_JOB_WORKERS, ttl=DEFAULT_JOB_TTL,
+                 max_pending=DEFAULT_MAX_PENDING_JOBS, render_workers=DEFAULT_PDF_WORKERS, cache=None):
+        self.directory = directory
+        self.workers = workers
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self.render_workers = render_workers
+        self.cache = cache
+        self.executor = None
+        self.active = {}
+        self.last_cleanup = 0
+        self.lock = threading.Lock()
+
+    def _path(self, job_id, extension):
+        return os.path.join(self.directory, f'{job_id}.{extension}')
+
+    def _write_job(self, job):
+        """Gravar o estado da tarefa (troca atômica do arquivo)"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as temp_file:
+                json.dump(job, temp_file, ensure_ascii=False)
+            os.replace(temp_path, self._path(job['id'], 'json'))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def submit(self, pdf_data, filename):
+        """Enfileirar a geração de um PDF e retornar o estado inicial da tarefa"""
+        self.cleanup()
+        with self.lock:
+            if len(self.active) >= self.max_pending:
+                raise JobQueueFull(f'Fila de PDFs cheia ({self.max_pending} tarefas); tente novamente em instantes')
+            if self.executor is None:
+                # Criado no primeiro uso (depois do fork, no caso do gunicorn)
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pdf-job')
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'queued',
+                'progress': 0.0,
+                'filename': filename,
+                'error': None,
+                'created_at': _now(),
+                'started_at': None,
+                'finished_at': None,
+            }
+            self._write_job(job)
+            self.active[job['id']] = job
+            # Cópia: a thread da tarefa altera o dicionário original
+            initial = dict(job)
+            self.executor.submit(self._run, job, pdf_data)
+        return initial
+
+    def _run(self, job, pdf_data):
+        """Executar a tarefa (thread do executor)"""
+        try:
+            job.update(status='running', progress=0.1, started_at=_now())
+            self._write_job(job)
+
+            # PDF já gerado antes com os mesmos dados: só copiar do cache
+            key = pdf_cache_key(pdf_data)
+            pdf = None
+            cached_file = self.cache.get(key) if self.cache is not None else None
+            if cached_file is not None:
+                with cached_file:
+                    pdf = cached_file.read()
+
+            if pdf is None:
+                pdf = render_pdf(pdf_data, self.render_workers)
+                if self.cache is not None:
+                    self.cache.put(key, pdf)
+
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(pdf)
+            os.replace(temp_path, self._path(job['id'], 'pdf'))
+
+            job.update(status='done', progress=1.0, finished_at=_now())
+        except Exception as e:
+            job.update(status='failed', error=str(e), finished_at=_now())
+        finally:
+            try:
+                self._write_job(job)
+            finally:
+                with self.lock:
+                    self.active.pop(job['id'], None)
+
+    def get(self, job_id):
+        """Estado da tarefa (None se não existir ou já expirou)"""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        self.cleanup()
+        path = self._path(job_id, 'json')
+        try:
+            with open(path, encoding='utf-8') as job_file:
+                job = json.load(job_file)
+            updated = os.path.getmtime(path)
+        except (OSError, ValueError):
+            return None
+
+        if job['status'] in ('done', 'failed'):
+            job['expires_at'] = datetime.fromtimestamp(updated + self.ttl).isoformat(timespec='seconds')
+        return job
+
+    def artifact_path(self, job_id):
+        """Caminho do PDF pronto (None se ainda não existe ou já expirou)"""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        path = self._path(job_id, 'pdf')
+        return path if os.path.exists(path) else None
+
+    def cleanup(self, force=False):
+        """Apagar tarefas e PDFs sem atualização há mais de ttl segundos"""
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_cleanup < CLEANUP_INTERVAL:
+                return
+            self.last_cleanup = now
+            active = set(self.active)
+
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            job_id = name.split('.', 1)[0]
+            if job_id in active:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass  # Apagado por outro processo
+
+    def shutdown(self, wait=True):
+        """Cancelar as tarefas que não começaram e esperar as em andamento"""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is None:
+            return
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+        # Tarefas canceladas: avisar quem estiver consultando
+        with self.lock:
+            cancelled = [job for job in self.active.values() if job['status'] == 'queued']
+        for job in cancelled:
+            job.update(status='failed', error='Servidor encerrado antes da geração do PDF', finished_at=_now())
+            self._write_job(job)
+            with self.lock:
+                self.active.pop(job['id'], None)
+
+
+def init_pdf_jobs(app):
+    """Criar a fila de PDFs conforme PDF_JOBS_DIR, PDF_JOB_WORKERS e PDF_JOB_TTL"""
+    directory = app.config.get('PDF_JOBS_DIR') or os.path.join(tempfile.gettempdir(), 'receitas_pdf_jobs')
+    queue = PDFJobQueue(
+        directory,
+        workers=app.config.get('PDF_JOB_WORKERS', DEFAULT_JOB_WORKERS),
+        ttl=app.config.get('PDF_JOB_TTL', DEFAULT_JOB_TTL),
+        max_pending=app.config.get('PDF_JOB_MAX_PENDING', DEFAULT_MAX_PENDING_JOBS),
+        render_workers=app.config.get('PDF_POOL_WORKERS', DEFAULT_PDF_WORKERS),
+        cache=app.extensions.get('pdf_cache')
+    )
+    app.extensions['pdf_jobs'] = queue
+    return queue
+
+
+def get_pdf_jobs():
+    """Fila de PDFs da aplicação atual (criada na primeira chamada, se necessário)"""
+    queue = current_app.extensions.get('pdf_jobs')
+    if queue is None:
+        queue = init_pdf_jobs(current_app)
+    return queue
+
+
+def shutdown_pdf_jobs(app):
+    """Encerrar a fila de PDFs da aplicação (se existir)"""
+    queue = app.extensions.get('pdf_jobs')
+    if queue is not None:
+        queue.shutdown()
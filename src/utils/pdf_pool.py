@@ -0,0 +1,152 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.utils.metrics import observe_pdf_render, observe_pdf_failure
+
+# Número padrão de processos para renderização em lote
+DEFAULT_PDF_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def render_pdf_bytes(job):
+    """Renderizar uma receita e devolver os bytes do PDF
+
+    job é um dicionário simples (paciente_info, medicamentos_info, num_receitas,
+    data_inicial, observacoes) para poder ser enviado a outro processo.
+    """
+    # ReportLab só é importado quando o primeiro PDF é gerado (início mais rápido)
+    from src.utils.pdf_generator import get_pdf_generator
+
+    buffer = io.BytesIO()
+    get_pdf_generator().generate_pdf(
+        job['paciente_info'],
+        job['medicamentos_info'],
+        job['num_receitas'],
+        job['data_inicial'],
+        job['observacoes'],
+        output=buffer
+    )
+    return buffer.getvalue()
+
+
+def render_pdf_timed(job):
+    """Renderizar e devolver (bytes, segundos), medidos no processo que renderiza"""
+    started = time.perf_counter()
+    pdf = render_pdf_bytes(job)
+    return pdf, time.perf_counter() - started
+
+
+def warm_up_pdf_worker():
+    """Preparar o gerador de PDF em um processo novo do pool"""
+    from src.utils.pdf_generator import warm_up_pdf_generator
+    warm_up_pdf_generator()
+
+
+def get_pdf_pool(workers=DEFAULT_PDF_WORKERS):
+    """Obter o pool de processos de renderização (criado no primeiro uso)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_up_pdf_worker)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pdf_pool(wait=True):
+    """Encerrar o pool de processos (se existir)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait)
+        _pool = None
+        _pool_workers = None
+
+
+def render_pdf(job, workers=DEFAULT_PDF_WORKERS, origem='tarefa'):
+    """Renderizar um PDF no pool de processos (quando workers > 1) e devolver os bytes
+
+    Usado pelas tarefas em segundo plano: a renderização não disputa o GIL
+    com as threads que atendem as requisições.
+    """
+    try:
+        if workers <= 1:
+            pdf, seconds = render_pdf_timed(job)
+        else:
+            pdf, seconds = get_pdf_pool(workers).submit(render_pdf_timed, job).result()
+    except BrokenProcessPool:
+        observe_pdf_failure(origem)
+        # Um processo que morreu inutiliza o pool; recriar na próxima chamada
+        shutdown_pdf_pool(wait=False)
+        raise
+    except Exception:
+        observe_pdf_failure(origem)
+        raise
+
+    observe_pdf_render(origem, seconds, job['num_receitas'], len(pdf))
+    return pdf
+
+
+def render_many(jobs, workers=DEFAULT_PDF_WORKERS, origem='lote'):
+    """Renderizar vários PDFs, em paralelo quando workers > 1
+
+    Retorna uma lista na mesma ordem de jobs, com (bytes, None) em caso de
+    sucesso ou (None, mensagem de erro) para o item que falhou.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        results = []
+        for job in jobs:
+            try:
+                pdf, seconds = render_pdf_timed(job)
+            except Exception as e:
+                observe_pdf_failure(origem)
+                results.append((None, str(e)))
+                continue
+            observe_pdf_render(origem, seconds, job['num_receitas'], len(pdf))
+            results.append((pdf, None))
+        return results
+
+    pool = get_pdf_pool(workers)
+    futures = [pool.submit(render_pdf_timed, job) for job in jobs]
+
+    results = []
+    broken = False
+    for job, future in zip(jobs, futures):
+        try:
+            pdf, seconds = future.result()
+        except BrokenProcessPool as e:
+            broken = True
+            observe_pdf_failure(origem)
+            results.append((None, f'Processo de renderização interrompido: {e}'))
+            continue
+        except Exception as e:
+            observe_pdf_failure(origem)
+            results.append((None, str(e)))
+            continue
+        observe_pdf_render(origem, seconds, job['num_receitas'], len(pdf))
+        results.append((pdf, None))
+
+    # Um processo que morreu inutiliza o pool; recriar na próxima chamada
+    if broken:
+        shutdown_pdf_pool(wait=False)
+
+    return results
+
+
+def merge_pdfs(pdfs, output):
+    """Juntar vários PDFs (bytes) em um único documento gravado em output"""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(io.BytesIO(pdf))
+    writer.write(output)
+    writer.close()
+    return output
@@ -0,0 +1,218 @@
+import re
+from flask import current_app
+from sqlalchemy import text
+from src.models.receitas_models import db
+
+# Tokenizador sem acentos ("Joao" encontra "João") e índices de prefixo para busca enquanto digita
+FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'"
+
+# CPF indexado apenas com dígitos, para aceitar busca com ou sem pontuação
+CPF_DIGITS_SQL = "replace(replace(replace(coalesce({cpf}, ''), '.', ''), '-', ''), ' ', '')"
+
+# Texto da receita: observações + posologia/instruções de todos os medicamentos
+RECEITA_ROW_SQL = """
+    SELECT r.id,
+           coalesce(r.observacoes, ''),
+           coalesce((SELECT group_concat(rm.posologia, ' ') FROM receita_medicamentos rm WHERE rm.receita_id = r.id), ''),
+           coalesce((SELECT group_concat(rm.instrucoes, ' ') FROM receita_medicamentos rm WHERE rm.receita_id = r.id), '')
+    FROM receitas r
+"""
+
+FTS_TABLES = {
+    'pacientes': ('pacientes_fts', 'pacientes'),
+    'medicamentos': ('medicamentos_fts', 'medicamentos'),
+    'receitas': ('receitas_fts', 'receitas'),
+}
+
+# Pesos bm25 por coluna (maior peso = mais relevante)
+FTS_WEIGHTS = {
+    'pacientes_fts': (10.0, 5.0),
+    'medicamentos_fts': (10.0, 2.0, 1.0),
+    'receitas_fts': (1.0, 1.0, 1.0),
+}
+
+
+def _refresh_receita_sql(receita_id):
+    """SQL que reconstrói a linha de uma receita no índice"""
+    return f"""
+        DELETE FROM receitas_fts WHERE rowid = {receita_id};
+        INSERT INTO receitas_fts(rowid, observacoes, posologia, instrucoes)
+        {RECEITA_ROW_SQL} WHERE r.id = {receita_id};
+    """
+
+
+SCHEMA_STATEMENTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS pacientes_fts USING fts5(nome_completo, cpf, {FTS_OPTIONS})",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS medicamentos_fts USING fts5(denominacao_generica, concentracao, apresentacao, {FTS_OPTIONS})",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS receitas_fts USING fts5(observacoes, posologia, instrucoes, {FTS_OPTIONS})",
+
+    # Pacientes
+    f"""CREATE TRIGGER IF NOT EXISTS pacientes_fts_ai AFTER INSERT ON pacientes BEGIN
+        INSERT INTO pacientes_fts(rowid, nome_completo, cpf)
+        VALUES (new.id, new.nome_completo, {CPF_DIGITS_SQL.format(cpf='new.cpf')});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pacientes_fts_ad AFTER DELETE ON pacientes BEGIN
+        DELETE FROM pacientes_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS pacientes_fts_au AFTER UPDATE OF nome_completo, cpf ON pacientes BEGIN
+        DELETE FROM pacientes_fts WHERE rowid = old.id;
+        INSERT INTO pacientes_fts(rowid, nome_completo, cpf)
+        VALUES (new.id, new.nome_completo, {CPF_DIGITS_SQL.format(cpf='new.cpf')});
+    END""",
+
+    # Medicamentos
+    """CREATE TRIGGER IF NOT EXISTS medicamentos_fts_ai AFTER INSERT ON medicamentos BEGIN
+        INSERT INTO medicamentos_fts(rowid, denominacao_generica, concentracao, apresentacao)
+        VALUES (new.id, new.denominacao_generica, coalesce(new.concentracao, ''), coalesce(new.apresentacao, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS medicamentos_fts_ad AFTER DELETE ON medicamentos BEGIN
+        DELETE FROM medicamentos_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS medicamentos_fts_au AFTER UPDATE OF denominacao_generica, concentracao, apresentacao ON medicamentos BEGIN
+        DELETE FROM medicamentos_fts WHERE rowid = old.id;
+        INSERT INTO medicamentos_fts(rowid, denominacao_generica, concentracao, apresentacao)
+        VALUES (new.id, new.denominacao_generica, coalesce(new.concentracao, ''), coalesce(new.apresentacao, ''));
+    END""",
+
+    # Receitas (observações) e itens da receita (posologia/instruções)
+    f"""CREATE TRIGGER IF NOT EXISTS receitas_fts_ai AFTER INSERT ON receitas BEGIN
+        {_refresh_receita_sql('new.id')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS receitas_fts_au AFTER UPDATE OF observacoes ON receitas BEGIN
+        {_refresh_receita_sql('new.id')}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS receitas_fts_ad AFTER DELETE ON receitas BEGIN
+        DELETE FROM receitas_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS receita_medicamentos_fts_ai AFTER INSERT ON receita_medicamentos BEGIN
+        {_refresh_receita_sql('new.receita_id')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS receita_medicamentos_fts_au AFTER UPDATE ON receita_medicamentos BEGIN
+        {_refresh_receita_sql('old.receita_id')}
+        {_refresh_receita_sql('new.receita_id')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS receita_medicamentos_fts_ad AFTER DELETE ON receita_medicamentos BEGIN
+        {_refresh_receita_sql('old.receita_id')}
+    END""",
+]
+
+# Nomes das tabelas FTS5 e triggers criados por SCHEMA_STATEMENTS
+SCHEMA_OBJECTS = tuple(re.search(r'IF NOT EXISTS (\w+)', statement).group(1) for statement in SCHEMA_STATEMENTS)
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM pacientes_fts",
+    f"""INSERT INTO pacientes_fts(rowid, nome_completo, cpf)
+        SELECT id, nome_completo, {CPF_DIGITS_SQL.format(cpf='cpf')} FROM pacientes""",
+    "DELETE FROM medicamentos_fts",
+    """INSERT INTO medicamentos_fts(rowid, denominacao_generica, concentracao, apresentacao)
+        SELECT id, denominacao_generica, coalesce(concentracao, ''), coalesce(apresentacao, '') FROM medicamentos""",
+    "DELETE FROM receitas_fts",
+    f"INSERT INTO receitas_fts(rowid, observacoes, posologia, instrucoes) {RECEITA_ROW_SQL}",
+]
+
+
+def search_index_installed(conn):
+    """Verificar se todas as tabelas FTS5 e triggers já existem no banco"""
+    placeholders = ', '.join('?' for _ in SCHEMA_OBJECTS)
+    existing = conn.exec_driver_sql(
+        f"SELECT name FROM sqlite_master WHERE name IN ({placeholders})", SCHEMA_OBJECTS
+    ).scalars().all()
+    return len(existing) == len(SCHEMA_OBJECTS)
+
+
+def init_search_index(app, verify=False):
+    """Criar tabelas FTS5 e triggers (se necessário) e sincronizar o índice
+
+    Deve ser chamado dentro do app_context, depois das migrações. Com tudo
+    instalado, os triggers mantêm o índice em dia e a inicialização só
+    consulta o sqlite_master; a contagem das tabelas (lenta em bancos
+    grandes) roda quando algum objeto falta, como no primeiro início ou
+    depois de restaurar um banco antigo, ou com verify=True. Um índice fora
+    de sincronia com tudo instalado (ex.: banco editado à mão, sem os
+    triggers) só é reconstruído com verify=True: RECEITAS_SEARCH_INDEX_VERIFY=1
+    na inicialização ou python src/migrate.py --verify-search-index. Se o
+    SQLite não tiver FTS5, a busca volta a usar ILIKE.
+    """
+    state = app.extensions.setdefault('search_index', {'fts': False})
+    try:
+        with db.engine.begin() as conn:
+            if not verify and search_index_installed(conn):
+                state['fts'] = True
+                return True
+
+            for statement in SCHEMA_STATEMENTS:
+                conn.exec_driver_sql(statement)
+
+            # Reconstruir se o índice estiver fora de sincronia com as tabelas
+            out_of_sync = any(
+                conn.exec_driver_sql(f"SELECT count(*) FROM {fts}").scalar()
+                != conn.exec_driver_sql(f"SELECT count(*) FROM {base}").scalar()
+                for fts, base in FTS_TABLES.values()
+            )
+            if out_of_sync:
+                print('Índice de busca fora de sincronia com as tabelas: reconstruindo')
+                for statement in REBUILD_STATEMENTS:
+                    conn.exec_driver_sql(statement)
+        state['fts'] = True
+    except Exception as e:
+        print(f"Busca FTS5 indisponível, usando ILIKE: {e}")
+        state['fts'] = False
+    return state['fts']
+
+
+def rebuild_search_index():
+    """Reconstruir todo o índice de busca a partir das tabelas"""
+    with db.engine.begin() as conn:
+        for statement in REBUILD_STATEMENTS:
+            conn.exec_driver_sql(statement)
+
+
+def fts_enabled():
+    """Verificar se o índice FTS5 está ativo para a aplicação atual"""
+    return current_app.extensions.get('search_index', {}).get('fts', False)
+
+
+def build_match_query(term):
+    """Converter o texto digitado em uma consulta MATCH por prefixo
+
+    Cada palavra vira um termo de prefixo ("joa"*), todos obrigatórios.
+    Pontuação entre dígitos é removida para que CPFs formatados funcionem.
+    """
+    term = re.sub(r'(?<=\d)[.\-/](?=\d)', '', term or '')
+    tokens = re.findall(r'\w+', term)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def match_filter(kind, id_column, fallback_column, term):
+    """Filtro SQLAlchemy para buscar registros de uma tabela pelo índice
+
+    Usa uma subconsulta no índice FTS5; sem FTS5, faz ILIKE na coluna indicada.
+    """
+    match = build_match_query(term)
+    if not fts_enabled() or not match:
+        return fallback_column.ilike(f'%{term}%')
+
+    fts_table = FTS_TABLES[kind][0]
+    subquery = text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :fts_query")
+    return id_column.in_(subquery.bindparams(fts_query=match))
+
+
+def ranked_ids(kind, term, limit=20):
+    """Buscar ids ordenados por relevância (bm25) e a pontuação de cada um"""
+    match = build_match_query(term)
+    if not match:
+        return []
+
+    fts_table = FTS_TABLES[kind][0]
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS[fts_table])
+    result = db.session.execute(
+        text(f"""
+            SELECT rowid, bm25({fts_table}, {weights}) AS rank
+            FROM {fts_table}
+            WHERE {fts_table} MATCH :fts_query
+            ORDER BY rank
+            LIMIT :limit
+        """),
+        {'fts_query': match, 'limit': limit}
+    )
+    return [(row[0], row[1]) for row in result]
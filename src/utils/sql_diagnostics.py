@@ -0,0 +1,130 @@
+import re
+import time
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from src.models.receitas_models import db
+
+# Consultas acima deste tempo vão para o log, com o plano de execução
+DEFAULT_SLOW_QUERY_MS = 100
+
+# Repetições da mesma consulta (mudando só os parâmetros) em uma requisição para acusar N+1
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+# Cabeçalhos de depuração adicionados às respostas
+QUERY_COUNT_HEADER = 'X-SQL-Queries'
+QUERY_TIME_HEADER = 'X-SQL-Time-Ms'
+N_PLUS_ONE_HEADER = 'X-SQL-N-Plus-One'
+
+# Listas IN expandidas: (?, ?, ?) e (?), (?) viram um único marcador
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def query_shape(statement):
+    """Forma da consulta: o SQL sem diferença de espaços e de tamanho das listas IN"""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def explain_query_plan(dbapi_connection, statement, parameters):
+    """Plano de execução (EXPLAIN QUERY PLAN) como texto, uma etapa por linha"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return '\n'.join(f'    {row[-1]}' for row in cursor.fetchall())
+    except Exception as e:
+        return f'    (plano indisponível: {e})'
+    finally:
+        cursor.close()
+
+
+class SQLDiagnostics:
+    """Diagnóstico das consultas SQL por requisição
+
+    Registra eventos do engine para contar consultas e o tempo gasto em cada
+    requisição, gravar no log as consultas lentas (com o plano de execução do
+    SQLite) e acusar padrões N+1: a mesma consulta repetida muitas vezes na
+    mesma requisição, mudando só os parâmetros (típico de relacionamentos
+    carregados sob demanda dentro de um laço).
+
+    Consultas feitas depois do after_request (respostas transmitidas aos
+    poucos) e fora de requisições (tarefas em segundo plano) só passam pelo
+    log de consultas lentas.
+    """
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('sql_diagnostics_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['sql_diagnostics_start'].pop()
+
+        if has_request_context():
+            stats = g.get('sql_stats')
+            if stats is None:
+                stats = g.sql_stats = {'count': 0, 'seconds': 0.0, 'shapes': Counter()}
+            stats['count'] += 1
+            stats['seconds'] += elapsed
+            stats['shapes'][query_shape(statement)] += 1
+
+        if elapsed >= self.slow_query_seconds:
+            self.log_slow_query(cursor, statement, parameters, executemany, elapsed)
+
+    def handle_error(self, exception_context):
+        # Consulta com erro não chega ao after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('sql_diagnostics_start'):
+            conn.info['sql_diagnostics_start'].pop()
+
+    def log_slow_query(self, cursor, statement, parameters, executemany, elapsed):
+        """Gravar no log a consulta lenta e, para SELECT, o plano de execução"""
+        origem = f' [{request.method} {request.path}]' if has_request_context() else ''
+        message = f'Consulta lenta ({elapsed * 1000:.1f} ms){origem}: {_WHITESPACE.sub(" ", statement).strip()}'
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            message += '\n' + explain_query_plan(cursor.connection, statement, parameters)
+        print(message)
+
+    def n_plus_one(self, stats):
+        """Consultas repetidas a partir do limite, da mais repetida para a menos"""
+        return [
+            (shape, count) for shape, count in stats['shapes'].most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+    def after_request(self, response):
+        """Adicionar os cabeçalhos de depuração e acusar os padrões N+1"""
+        stats = g.pop('sql_stats', None) or {'count': 0, 'seconds': 0.0, 'shapes': Counter()}
+        repeated = self.n_plus_one(stats)
+
+        response.headers[QUERY_COUNT_HEADER] = str(stats['count'])
+        response.headers[QUERY_TIME_HEADER] = f"{stats['seconds'] * 1000:.1f}"
+        response.headers[N_PLUS_ONE_HEADER] = str(len(repeated))
+
+        for shape, count in repeated:
+            print(f'Possível N+1 em {request.method} {request.path}: {count} execuções de {shape}')
+        return response
+
+
+def init_sql_diagnostics(app):
+    """Ativar o diagnóstico de SQL quando SQL_DIAGNOSTICS estiver ligado
+
+    Configurações: SQL_DIAGNOSTICS, SQL_SLOW_QUERY_MS e SQL_N_PLUS_ONE_THRESHOLD.
+    Deve ser chamado dentro do app_context, depois de db.init_app(app).
+    Desligado, não registra nenhum evento (sem custo nas consultas).
+    """
+    if not app.config.get('SQL_DIAGNOSTICS'):
+        return None
+
+    diagnostics = SQLDiagnostics(
+        slow_query_ms=app.config.get('SQL_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS),
+        n_plus_one_threshold=app.config.get('SQL_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    )
+    event.listen(db.engine, 'before_cursor_execute', diagnostics.before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', diagnostics.after_cursor_execute)
+    event.listen(db.engine, 'handle_error', diagnostics.handle_error)
+    app.after_request(diagnostics.after_request)
+    app.extensions['sql_diagnostics'] = diagnostics
+    return diagnostics
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Com 1, as etapas da inicialização e do aquecimento são medidas (usado por src/server.py --startup-profile)
+STARTUP_PROFILE_ENV = 'RECEITAS_STARTUP_PROFILE'
+
+
+class StartupProfile:
+    """Tempo de cada etapa da inicialização da aplicação"""
+
+    def __init__(self):
+        self.enabled = os.environ.get(STARTUP_PROFILE_ENV) == '1'
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self):
+        """Texto com as etapas medidas, em milissegundos"""
+        lines = [f'  {name:<40} {seconds * 1000:8.1f} ms' for name, seconds in self.phases]
+        return '\n'.join(lines)
+
+
+_profile = StartupProfile()
+
+
+def startup_phase(name):
+    """Medir uma etapa da inicialização (with startup_phase('...'):)"""
+    return _profile.phase(name)
+
+
+def startup_report():
+    """Etapas da inicialização medidas até agora"""
+    return _profile.report()
+
+
+def warm_up(app):
+    """Carregar ReportLab, preparar o gerador de PDF e o catálogo de medicamentos"""
+    from src.utils.pdf_generator import warm_up_pdf_generator
+    from src.utils.medicamento_catalog import get_medicamento_catalog
+
+    with startup_phase('aquecimento: gerador de PDF'):
+        warm_up_pdf_generator()
+    with startup_phase('aquecimento: catálogo de medicamentos'):
+        with app.app_context():
+            get_medicamento_catalog().get()
+
+
+def start_background_warm_up(app):
+    """Aquecer a aplicação em uma thread, depois que o servidor já aceita conexões
+
+    A primeira requisição que precisar do PDF antes do fim do aquecimento
+    apenas espera o mesmo carregamento (os imports e o gerador são
+    protegidos por lock). Executado uma vez por processo.
+    """
+    if app.extensions.get('warm_up') is not None:
+        return app.extensions['warm_up']
+
+    def run():
+        try:
+            warm_up(app)
+        except Exception as e:
+            print(f'Erro no aquecimento da aplicação: {e}')
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    app.extensions['warm_up'] = thread
+    thread.start()
+    return thread
@@ -0,0 +1,134 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response, Response
+from sqlalchemy import event, select, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from flask_sqlalchemy.session import Session
+from src.models.receitas_models import db, VersaoTabela
+from src.utils.compression import etag_matches
+
+# Chave em session.info com as tabelas alteradas na transação atual
+CHANGED_TABLES_KEY = 'tabelas_alteradas'
+
+_tracking = False
+
+
+def _changed_tables(session):
+    return session.info.setdefault(CHANGED_TABLES_KEY, set())
+
+
+def _after_flush(session, flush_context):
+    """Anotar as tabelas dos objetos gravados pelo ORM"""
+    changed = _changed_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None:
+            changed.add(table.name)
+
+
+def _do_orm_execute(orm_execute_state):
+    """Anotar as tabelas de INSERT/UPDATE/DELETE executados direto (importações em lote)"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            _changed_tables(orm_execute_state.session).add(table.name)
+
+
+def _before_commit(session):
+    """Incrementar, na mesma transação, a versão das tabelas alteradas"""
+    # O commit só grava os objetos pendentes depois deste evento: gravar antes para anotá-los
+    session.flush()
+    changed = session.info.pop(CHANGED_TABLES_KEY, set())
+    changed.discard(VersaoTabela.__tablename__)
+    if not changed:
+        return
+
+    statement = sqlite_insert(VersaoTabela).values([{'nome': nome, 'versao': 1} for nome in sorted(changed)])
+    statement = statement.on_conflict_do_update(
+        index_elements=['nome'],
+        set_={'versao': VersaoTabela.versao + 1}
+    )
+    session.execute(statement)
+    session.info.pop(CHANGED_TABLES_KEY, None)
+
+
+def _after_rollback(session):
+    session.info.pop(CHANGED_TABLES_KEY, None)
+
+
+def track_table_versions():
+    """Registrar os eventos que mantêm versoes_tabelas atualizada a cada commit
+
+    As versões ficam no próprio banco e são incrementadas na transação que fez
+    a alteração, então valem para todos os processos do servidor.
+    """
+    global _tracking
+    if _tracking:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'do_orm_execute', _do_orm_execute)
+    event.listen(Session, 'before_commit', _before_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
+    _tracking = True
+
+
+def table_versions(tables):
+    """Versão atual de cada tabela (0 se nunca alterada), com uma consulta"""
+    versions = dict.fromkeys(tables, 0)
+    rows = db.session.execute(
+        select(VersaoTabela.nome, VersaoTabela.versao).where(VersaoTabela.nome.in_(tables))
+    )
+    for nome, versao in rows:
+        versions[nome] = versao
+    return versions
+
+
+def bump_table_versions(previous):
+    """Incrementar a versão de todas as tabelas (ex.: depois de restaurar um backup)
+
+    previous são as versões anteriores à troca do conteúdo do banco: cada
+    tabela fica acima delas e acima da versão atual, para nenhum ETag antigo
+    voltar a valer.
+    """
+    nomes = sorted(nome for nome in db.metadata.tables if nome != VersaoTabela.__tablename__)
+    statement = sqlite_insert(VersaoTabela).values(
+        [{'nome': nome, 'versao': previous.get(nome, 0) + 1} for nome in nomes]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['nome'],
+        set_={'versao': func.max(VersaoTabela.versao + 1, statement.excluded.versao)}
+    )
+    db.session.execute(statement)
+    db.session.commit()
+
+
+def list_etag(tables):
+    """ETag forte da listagem: URL completa (filtros e cursor) mais a versão das tabelas"""
+    versions = table_versions(tables)
+    key = request.full_path + '|' + ','.join(f'{nome}:{versions[nome]}' for nome in tables)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional_list(*tables):
+    """Decorador de listagens: 304 sem consultar linhas quando o If-None-Match confere
+
+    tables são todas as tabelas cujos dados aparecem na resposta.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Calculado antes da consulta: uma gravação no meio só deixa o ETag mais antigo
+            etag = list_etag(tables)
+            if etag_matches(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # O navegador guarda a resposta, mas sempre confirma com o servidor
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator